@@ -0,0 +1,113 @@
+"""
+Measure the cost of extracting an Entry from each item parsed by feedparser,
+using Entry.from_item(), and the original implementation, for comparison.
+
+The benchmarks are not part of the test suite. Run them from the root of
+the project, with -s to see the results:
+
+    pytest benchmarks/test_entries.py -s
+
+"""
+import timeit
+from html import unescape
+
+from django.core.exceptions import ValidationError
+
+import feedparser  # type: ignore
+
+from feeds import loader
+
+ITEM = """
+    <item>
+      <title>Article %(n)d &amp; more</title>
+      <link>https://www.example.com/articles/%(n)d/</link>
+      <guid isPermaLink="false">article-%(n)d</guid>
+      <description>%(summary)s</description>
+      <pubDate>Mon, 02 Oct 2023 10:00:00 +0000</pubDate>
+      <author>joe@example.com (Joe Bloggs)</author>
+      <category>News</category>
+      <category>Sport</category>
+    </item>
+"""
+
+DOCUMENT = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Feed</title>%s</channel></rss>
+"""
+
+
+def get_entries(count):
+    items = "".join(ITEM % {"n": n, "summary": "Summary " * 50} for n in range(count))
+    return feedparser.parse(DOCUMENT % items).entries
+
+
+def from_feedparser_dict(item):
+    # The original implementation which read each value through
+    # FeedParserDict, which maps alternative names for the keys on every
+    # lookup, in a separate function for each field.
+    def get_url(item):
+        try:
+            if link := item.get("link", ""):
+                loader.validate_url(link)
+        except ValidationError:
+            link = ""
+        return link
+
+    def get_published(item):
+        if date := item.get("published", None):
+            date = loader.parse_date(date)
+        return date
+
+    names = [
+        author.get("name") for author in item.get("authors", []) if author.get("name")
+    ]
+    tags = sorted([tag.get("term") for tag in item.get("tags", []) if tag.get("term")])
+
+    return loader.Entry(
+        identifier=item.get("id", item.get("link", "")),
+        title=loader.filter_title(unescape(item.get("title", ""))),
+        summary=unescape(item.get("summary", "")),
+        url=get_url(item),
+        published=get_published(item),
+        authors=loader.filter_authors(names),
+        tags=loader.filter_tags(tags),
+    )
+
+
+def measure(func, entries):
+    def extract():
+        for item in entries:
+            func(item)
+
+    best = min(timeit.repeat(extract, number=1, repeat=20))
+    return best / len(entries) * 1e6
+
+
+def report(entries):
+    assert [from_feedparser_dict(item) for item in entries] == [
+        loader.Entry.from_item(item) for item in entries
+    ]
+    print(
+        "FeedParserDict lookups: %.1f µs per entry"
+        % measure(from_feedparser_dict, entries)
+    )
+    print(
+        "Entry.from_item(): %.1f µs per entry"
+        % measure(loader.Entry.from_item, entries)
+    )
+
+
+def test_extract_entries():
+    entries = get_entries(500)
+    print("\nAll values")
+    report(entries)
+
+
+def test_extract_values(monkeypatch):
+    # Parsing the date and validating the URL take most of the time, so
+    # they are replaced to measure the cost of getting the values from
+    # each item.
+    monkeypatch.setattr(loader, "parse_date", lambda *args: None)
+    monkeypatch.setattr(loader, "validate_url", lambda value: value)
+    entries = get_entries(500)
+    print("\nValues only")
+    report(entries)
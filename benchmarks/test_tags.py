@@ -0,0 +1,94 @@
+"""
+Measure the cost of weighting the tags for a tag cloud.
+
+The benchmarks are not part of the test suite. Run them from the root of
+the project, with -s to see the results:
+
+    pytest benchmarks/test_tags.py -s
+
+"""
+import random
+import time
+from typing import Dict
+
+from django.utils import timezone
+
+import pytest
+
+from feeds.models import Article, Tag
+from feeds.tests.factories import FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+ARTICLES = 100000
+TAGS = 500
+TAGS_PER_ARTICLE = 3
+
+
+@pytest.fixture
+def articles():
+    feed = FeedFactory.create()
+    now = timezone.now()
+    Article.objects.bulk_create(
+        [
+            Article(
+                title="Article %d" % n,
+                url="https://www.example.com/articles/%d/" % n,
+                date=now,
+                feed=feed,
+                source=feed.source,
+                identifier="article-%d" % n,
+            )
+            for n in range(ARTICLES)
+        ],
+        batch_size=5000,
+    )
+    tags = Tag.objects.bulk_create(
+        [Tag(name="Tag %d" % n, slug="tag-%d" % n) for n in range(TAGS)]
+    )
+    # Skew the distribution, as in real feeds, so a few tags are used a lot.
+    weights = [1 / (n + 1) for n in range(TAGS)]
+    TagRelation = Article.tags.through
+    TagRelation.objects.bulk_create(
+        [
+            TagRelation(article_id=pk, tag_id=tag.pk)
+            for pk in Article.objects.values_list("pk", flat=True)
+            for tag in set(random.choices(tags, weights, k=TAGS_PER_ARTICLE))
+        ],
+        batch_size=5000,
+    )
+    return Article.objects.all()
+
+
+def weighted_in_python(queryset):
+    # The original implementation which counted the rows in python.
+    results: Dict[Tag, int] = {}
+    for tag in queryset:
+        results.setdefault(tag, 0)
+        results[tag] += 1
+    counts = results.values()
+    highest, lowest = max(counts), min(counts)
+    interval = (highest - lowest + 1) / 6
+    for tag, count in results.items():
+        tag.weight = int((count - lowest) / interval) + 1
+    return list(results.keys())
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def test_weighted(articles):
+    queryset = Tag.objects.for_articles(articles)
+    expected, python = measure(lambda: weighted_in_python(queryset.all()))
+    actual, database = measure(lambda: queryset.all().weighted())
+
+    assert {tag.pk: tag.weight for tag in actual} == {
+        tag.pk: tag.weight for tag in expected
+    }
+
+    print("\n%d articles, %d tags" % (ARTICLES, len(actual)))
+    print("Counted in python: %.0f ms" % python)
+    print("Counted by the database: %.0f ms" % database)
@@ -3,3 +3,19 @@ from django.apps import AppConfig
 
 class Config(AppConfig):
     name = "demo"
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed, post_save, pre_delete
+
+        from feeds.models import Article, Tag
+        from feeds.signals import articles_added
+
+        from . import caches
+
+        post_save.connect(caches.article_saved, sender=Article)
+        pre_delete.connect(caches.article_deleted, sender=Article)
+        m2m_changed.connect(caches.relations_changed, sender=Article.authors.through)
+        m2m_changed.connect(caches.relations_changed, sender=Article.tags.through)
+        post_save.connect(caches.tag_saved, sender=Tag)
+        pre_delete.connect(caches.tag_deleted, sender=Tag)
+        articles_added.connect(caches.articles_added)
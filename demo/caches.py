@@ -0,0 +1,127 @@
+"""
+Cache the tag clouds shown on the pages of Articles.
+
+Building a tag cloud means counting the tags for all the Articles on a page,
+so the results are cached, for each page, in each scope: all the Articles,
+the Articles by an Author, or the Articles from a Source. Each scope has a
+version, which is part of the key, so all the pages in a scope can be
+invalidated at once, by changing the version, when Articles are published
+or their authors or tags change, or when a Tag is renamed or deleted.
+
+"""
+import random
+import uuid
+from typing import Iterable, List
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from feeds.models import Article, Author, Source, Tag
+
+TIMEOUT = 60 * 60
+
+ARTICLES = "articles"
+
+
+def author_scope(slug: str) -> str:
+    return "author:%s" % slug
+
+
+def source_scope(slug: str) -> str:
+    return "source:%s" % slug
+
+
+def get_version(scope: str) -> str:
+    key = "demo:tags:%s:version" % scope
+    if version := cache.get(key):
+        return version
+    cache.add(key, uuid.uuid4().hex, None)
+    return cache.get(key, "")
+
+
+def get_tag_cloud(scope: str, page: str, articles) -> List[Tag]:
+    # A shuffled copy of the cached list is returned, rather than the tags
+    # being shuffled before they are cached, so the order changes on every
+    # request.
+    key = "demo:tags:%s:%s:%s" % (scope, get_version(scope), page)
+    tags = cache.get(key)
+    if tags is None:
+        tags = Tag.objects.for_articles(articles).weighted()
+        cache.set(key, tags, TIMEOUT)
+    return random.sample(tags, len(tags))
+
+
+def invalidate_scopes(scopes: Iterable[str]) -> None:
+    keys = ["demo:tags:%s:version" % scope for scope in set(scopes)]
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def get_scopes(articles: Iterable[int], authors: Iterable[int] = ()) -> List[str]:
+    query = Q(articles__in=articles) | Q(pk__in=authors)
+    author_slugs = Author.objects.filter(query).values_list("slug", flat=True)
+    source_slugs = Source.objects.filter(articles__in=articles).values_list(
+        "slug", flat=True
+    )
+    return [
+        ARTICLES,
+        *[author_scope(slug) for slug in author_slugs],
+        *[source_scope(slug) for slug in source_slugs],
+    ]
+
+
+def invalidate_articles(articles: Iterable[int], authors: Iterable[int] = ()) -> None:
+    # The versions are changed once the changes are committed, otherwise
+    # a request could cache the old tag cloud again before then.
+    articles, authors = list(articles), list(authors)
+    transaction.on_commit(lambda: invalidate_scopes(get_scopes(articles, authors)))
+
+
+def article_saved(instance: Article, **kwargs) -> None:
+    # Called by the post_save signal for Article.
+    invalidate_articles([instance.pk])
+
+
+def article_deleted(instance: Article, **kwargs) -> None:
+    # Called by the pre_delete signal for Article. The scopes are found
+    # now, while the Article is still related to its authors and source.
+    scopes = get_scopes([instance.pk])
+    transaction.on_commit(lambda: invalidate_scopes(scopes))
+
+
+def relations_changed(instance, action, reverse, model, pk_set, **kwargs) -> None:
+    # Called by the m2m_changed signal for the authors and tags of an
+    # Article. Authors which are removed are included, so the tag cloud
+    # for their Articles is updated too.
+    if reverse:
+        articles = pk_set or []
+        authors = [instance.pk] if isinstance(instance, Author) else []
+    else:
+        articles = [instance.pk]
+        authors = (pk_set or []) if model is Author else []
+        if action == "pre_clear" and model is Author:
+            authors = instance.authors.values_list("pk", flat=True)
+    if action.startswith("post_") or action == "pre_clear":
+        invalidate_articles(articles, authors)
+
+
+def tag_saved(instance: Tag, created: bool, **kwargs) -> None:
+    # Called by the post_save signal for Tag, for example, when it is
+    # renamed. A new Tag has no Articles yet so nothing is cached for it.
+    if not created:
+        articles = Article.objects.filter(tags=instance.pk)
+        pks = articles.values_list("pk", flat=True)
+        transaction.on_commit(lambda: invalidate_scopes(get_scopes(pks)))
+
+
+def tag_deleted(instance: Tag, **kwargs) -> None:
+    # Called by the pre_delete signal for Tag. The scopes are found now,
+    # while the Tag is still related to its Articles.
+    articles = Article.objects.filter(tags=instance.pk)
+    scopes = get_scopes(articles.values_list("pk", flat=True))
+    transaction.on_commit(lambda: invalidate_scopes(scopes))
+
+
+def articles_added(articles: List[Article], **kwargs) -> None:
+    # Called by the articles_added signal when a feed is loaded.
+    invalidate_articles([article.pk for article in articles])
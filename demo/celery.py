@@ -29,9 +29,9 @@ app.config_from_object(CeleryConfig)
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
-# A celery task runs every hour, on the error and checked the schedule for
-# each active feed. If the schedule, also a crontab, matches the current
-# time then the feed is loaded. This two-level approach comes in useful for
+# A celery task runs every hour, on the hour, and dispatches a separate task
+# to load each Feed which is due, according to its schedule. That spreads the
+# load across all the workers. This two-level approach comes in useful for
 # feeds that are either updated in frequently, so there's no need to cook
 # the planet by checking every hour, or, dealing with throttling by services
 # such as Cloudflare, where too many request s
@@ -41,7 +41,7 @@ minute, hour, day_of_week, day_of_month, month_of_year = FEEDS_TASK_SCHEDULE.spl
 
 app.conf.beat_schedule = {
     "load-feeds": {
-        "task": "demo.tasks.load_feeds",
+        "task": "feeds.tasks.load_feeds",
         "schedule": crontab(
             minute=minute,
             hour=hour,
@@ -62,7 +62,8 @@ app.conf.beat_schedule = {
 # Some queuing of messages does appear to be happending.
 
 app.conf.task_routes = {
-    "demo.tasks.load_feeds": {"delivery_mode": "transient"},
+    "feeds.tasks.load_feeds": {"delivery_mode": "transient"},
+    "feeds.tasks.load_feed": {"delivery_mode": "transient"},
 }
 
 
@@ -1,12 +1,18 @@
 from datetime import timedelta
 from math import ceil
+from typing import Any, Dict
 
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import Left, Upper
 from django.utils import timezone
 from django.utils.functional import cached_property
 
 from text_unidecode import unidecode  # type: ignore
 
+from feeds.models.article import fingerprint
+
 
 class DayPaginator(Paginator):
     """
@@ -36,33 +42,102 @@ class DayPaginator(Paginator):
 
 
 class AlphabetPaginator(Paginator):
+    """
+    The AlphabetPaginator builds an index of the first page on which each
+    letter occurs. That allows a jump table to be displayed which takes the
+    reader to the page where items starting with a given letter begin.
+
+    The index is built with two aggregate queries, rather than loading every
+    object: the first finds the first value for each letter, the second counts
+    the number of objects which come before each of those values. The index
+    is cached, using the number of objects and the time the last one was
+    modified as part of the key, so it is rebuilt when objects are added,
+    renamed or deleted, or the cache expires. Both are found by the query
+    which counts the objects for the paginator. Only the objects on the
+    current page are loaded.
+    """
+
+    timeout = 60 * 60
+
     def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True):
         super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.attr_name = self.object_list.query.order_by[0]
+
+    @cached_property
+    def totals(self) -> Dict[str, Any]:
+        return self.object_list.order_by().aggregate(
+            count=Count("pk"), modified=Max("modified")
+        )
+
+    @cached_property
+    def count(self) -> int:
+        return self.totals["count"]
 
-        # Build an index of the first page on which each letter
-        # occurs. That allows a jump table to be displayed which
-        # takes the reader to the page where items starting with
-        # a given letter begin.
+    @cached_property
+    def index(self) -> Dict[str, int]:
+        modified = self.totals["modified"]
+        key = "demo:index:%s:%s:%s:%s" % (
+            fingerprint(str(self.object_list.query)),
+            self.per_page,
+            self.count,
+            modified.timestamp() if modified else 0,
+        )
+        index = cache.get(key)
+        if index is None:
+            index = self.get_index()
+            cache.set(key, index, self.timeout)
+        return index
 
-        self.index = {}
+    def get_index(self) -> Dict[str, int]:
+        # The rows can be repeated if the queryset joins other tables so
+        # only distinct objects are counted.
+        field = self.attr_name
+        queryset = self.object_list.order_by()
 
-        attr_name = self.object_list.query.order_by[0]
+        values = (
+            queryset.annotate(letter=Upper(Left(field, 1)))
+            .values("letter")
+            .annotate(first=Min(field))
+            .values_list("letter", "first")
+        )
+        firsts = [(letter, first) for letter, first in values if letter]
 
-        for idx, object in enumerate(self.object_list):
-            # Only index objects if the field is not blank
-            if value := str(getattr(object, attr_name)):
-                # normalise accented characters
-                letter = unidecode(value[0].upper())
+        if not firsts:
+            return {}
+
+        counts = queryset.aggregate(
+            **{
+                "letter_%d"
+                % idx: Count("pk", distinct=True, filter=Q(**{"%s__lt" % field: first}))
+                for idx, (letter, first) in enumerate(firsts)
+            }
+        )
+        positions = sorted(
+            (counts["letter_%d" % idx], letter)
+            for idx, (letter, first) in enumerate(firsts)
+        )
+
+        index: Dict[str, int] = {}
+        for position, letter in positions:
+            # normalise accented characters
+            index.setdefault(unidecode(letter), position // self.per_page + 1)
 
-                if letter not in self.index:
-                    page_number = int(idx / self.per_page) + 1
-                    self.index[letter] = page_number
+        return index
 
+    def page(self, number):
+        page = super().page(number)
+        page.object_list = list(page.object_list)
+
+        for object in page.object_list:
+            # Only index objects if the field is not blank
+            if value := str(getattr(object, self.attr_name)):
                 # Add the normalised letter to the object so a mini-heading
                 # can be displayed using the ifchanged template tag
-                object.index_letter = letter
+                object.index_letter = unidecode(value[0].upper())
 
                 # Add the first index page where the letter occurs. That
                 # allows a 'continued' label to display at the top of the
                 # page
-                object.index_page = self.index[letter]
+                object.index_page = self.index.get(object.index_letter, page.number)
+
+        return page
@@ -0,0 +1,21 @@
+import pytest
+
+from feeds.tests.conftest import use_local_cache  # noqa: F401
+
+
+# The views for an Article are saved by a background thread which uses its
+# own database connection, so it cannot see the data created in a test.
+@pytest.fixture(autouse=True)
+def save_views_immediately(settings):
+    settings.FEEDS_VIEWS_FLUSH_INTERVAL = 0
+
+
+# The tag clouds are cached and, since each test runs in a transaction which
+# is never committed, the cache would not be invalidated between tests.
+@pytest.fixture(autouse=True)
+def use_dummy_cache_backend(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
+    }
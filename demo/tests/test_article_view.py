@@ -25,3 +25,19 @@ def test_click_view(client, article):
     response = client.post(reverse("article-click"), data={"code": article.code})
     assert response.status_code == 204
     assert article_was_clicked(article)
+
+
+def test_view_cached(
+    client, article, monkeypatch, django_assert_num_queries, use_local_cache
+):
+    monkeypatch.setattr("demo.views.article.record_view", lambda code: None)
+    url = reverse("article", kwargs={"code": article.code})
+    client.get(url)
+    with django_assert_num_queries(0):
+        response = client.get(url, follow=False)
+    assert redirects_to(response, article.url)
+
+
+def test_view_gone(client, db):
+    response = client.get(reverse("article", kwargs={"code": "abcdef"}))
+    assert response.status_code == 410
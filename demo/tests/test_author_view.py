@@ -59,3 +59,46 @@ def test_errors(client):
 def test_query_count(client, url, articles, django_assert_num_queries):
     with django_assert_num_queries(4):
         client.get(url)
+
+
+def test_tags_cached(client, url, articles, use_local_cache, django_assert_num_queries):
+    client.get(url)
+    # The query for the tags is not repeated.
+    with django_assert_num_queries(3):
+        client.get(url)
+
+
+def test_tags_invalidated(
+    client, url, articles, use_local_cache, django_capture_on_commit_callbacks
+):
+    response = client.get(url)
+    article = response.context["object_list"][0]
+    tag = TagFactory.create()
+    with django_capture_on_commit_callbacks(execute=True):
+        article.tags.add(tag)
+    response = client.get(url)
+    assert tag in response.context["tags"]
+
+
+def test_tags_invalidated_when_renamed(
+    client, url, articles, use_local_cache, django_capture_on_commit_callbacks
+):
+    response = client.get(url)
+    tag = response.context["tags"][0]
+    tag.name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.save()
+    response = client.get(url)
+    assert "Renamed" in [tag.name for tag in response.context["tags"]]
+
+
+def test_tags_invalidated_when_deleted(
+    client, url, articles, use_local_cache, django_capture_on_commit_callbacks
+):
+    response = client.get(url)
+    tag = response.context["tags"][0]
+    pk = tag.pk
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.delete()
+    response = client.get(url)
+    assert pk not in [tag.pk for tag in response.context["tags"]]
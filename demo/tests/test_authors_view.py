@@ -1,6 +1,7 @@
 from django.urls import reverse
 
 import pytest
+from text_unidecode import unidecode  # type: ignore
 
 from feeds.tests.conditions.querysets import is_ordered, is_paginated
 from feeds.tests.factories import ArticleFactory, AuthorFactory
@@ -27,5 +28,37 @@ def test_get(client, url, authors):
 
 
 def test_query_count(client, url, authors, django_assert_num_queries):
-    with django_assert_num_queries(2):
+    # Count the objects, build the index with two queries, then fetch
+    # the objects on the page and their articles.
+    with django_assert_num_queries(5):
         client.get(url)
+
+
+def test_query_count_cached(
+    client, url, authors, use_local_cache, django_assert_num_queries
+):
+    client.get(url)
+    # The index is cached so it is not built again.
+    with django_assert_num_queries(3):
+        client.get(url)
+
+
+def test_index(client, url, authors):
+    response = client.get(url)
+    paginator = response.context["paginator"]
+    names = paginator.object_list.values_list("name", flat=True)
+    expected = {}
+    for idx, name in enumerate(names):
+        expected.setdefault(unidecode(name[0].upper()), idx // paginator.per_page + 1)
+    assert paginator.index == expected
+
+
+def test_index_rebuilt_when_renamed(client, url, authors, use_local_cache):
+    response = client.get(url)
+    paginator = response.context["paginator"]
+    letter = next(c for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if c not in paginator.index)
+    author = paginator.object_list.first()
+    author.name = letter + author.name
+    author.save()
+    response = client.get(url)
+    assert letter in response.context["paginator"].index
@@ -25,7 +25,16 @@ def test_get(client, url, sources):
 
 
 def test_query_count(client, url, sources, django_assert_num_queries):
-    # Includes a query to fetch the current site though this
-    # query does not appear in the debug toolbar
-    with django_assert_num_queries(2):
+    # Count the objects, build the index with two queries, then fetch
+    # the objects on the page and their articles.
+    with django_assert_num_queries(5):
+        client.get(url)
+
+
+def test_query_count_cached(
+    client, url, sources, use_local_cache, django_assert_num_queries
+):
+    client.get(url)
+    # The index is cached so it is not built again.
+    with django_assert_num_queries(3):
         client.get(url)
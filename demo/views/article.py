@@ -3,19 +3,19 @@ from django.utils.decorators import method_decorator
 from django.views import View, generic
 from django.views.decorators.csrf import csrf_exempt
 
-from feeds.models import Article
+from feeds.caches import get_article_url
+from feeds.counters import record_view
 
 
 class ArticleView(generic.RedirectView):
-    # In the off chance there are Articles with duplicate codes return the
-    # url for the latest once since that's the one most likely to have been
-    # clicked. If no such Article exist then return None so the RedirectView
-    # responds with 410 Gone.
+    # The URL is cached so following a link does not access the database.
+    # If no such Article exist then return None so the RedirectView responds
+    # with 410 Gone.
 
     def get_redirect_url(self, *args, **kwargs):
-        Article.objects.viewed(kwargs["code"])
-        if article := Article.objects.with_code(kwargs["code"]):
-            return article.url
+        if url := get_article_url(kwargs["code"]):
+            record_view(kwargs["code"])
+            return url
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -25,5 +25,5 @@ class ArticleClickView(View):
 
     def post(self, request):
         code = request.POST.get("code")
-        Article.objects.viewed(code)
+        record_view(code)
         return HttpResponse(status=204)
@@ -1,8 +1,9 @@
+from django.utils import timezone
 from django.views import generic
 
+from demo.caches import ARTICLES, get_tag_cloud
 from demo.paginators import DayPaginator
-from demo.views.utils import shuffle
-from feeds.models import Article, Tag
+from feeds.models import Article
 
 
 class ArticlesView(generic.ListView):
@@ -26,12 +27,14 @@ class ArticlesView(generic.ListView):
             groups[date].append(article)
         return groups
 
-    def get_tags(self, object_list):  # noqa
-        return shuffle(Tag.objects.for_articles(object_list).weighted())
+    def get_tags(self, object_list, page):  # noqa
+        # The pages are relative to today so the date is part of the key.
+        key = "%s:%s" % (timezone.now().date(), page.number)
+        return get_tag_cloud(ARTICLES, key, object_list)
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
         objects = context["object_list"]
-        context["tags"] = self.get_tags(objects)
+        context["tags"] = self.get_tags(objects, context["page_obj"])
         context["object_groups"] = self.get_groups_by_date(objects)
         return context
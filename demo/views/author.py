@@ -6,7 +6,7 @@ from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
 
-from demo.views.utils import shuffle
+from demo.caches import author_scope, get_tag_cloud
 from feeds.models import Article, Author, Tag
 
 
@@ -25,12 +25,13 @@ class AuthorView(generic.ListView):
     def get_author(self) -> Author:
         return Author.objects.get(slug=self.kwargs["slug"])
 
-    def get_tags(self, articles) -> List[Tag]:
-        return shuffle(Tag.objects.for_articles(articles).weighted())
+    def get_tags(self, articles, page) -> List[Tag]:
+        scope = author_scope(self.kwargs["slug"])
+        return get_tag_cloud(scope, page.number, articles)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["tags"] = self.get_tags(context["object_list"])
+        context["tags"] = self.get_tags(context["object_list"], context["page_obj"])
         return context
 
     def get(self, request, *args, **kwargs):
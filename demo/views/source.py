@@ -6,7 +6,7 @@ from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
 
-from demo.views.utils import shuffle
+from demo.caches import get_tag_cloud, source_scope
 from feeds.models import Article, Source, Tag
 
 
@@ -26,12 +26,13 @@ class SourceView(generic.ListView):
     def get_source(self) -> Source:
         return Source.objects.get(slug=self.kwargs["slug"])
 
-    def get_tags(self, articles) -> List[Tag]:
-        return shuffle(Tag.objects.for_articles(articles).weighted())
+    def get_tags(self, articles, page) -> List[Tag]:
+        scope = source_scope(self.kwargs["slug"])
+        return get_tag_cloud(scope, page.number, articles)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["tags"] = self.get_tags(context["object_list"])
+        context["tags"] = self.get_tags(context["object_list"], context["page_obj"])
         return context
 
     def get(self, request, *args, **kwargs):
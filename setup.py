@@ -39,6 +39,7 @@ setup(
         "feedparser",
         "python-dateutil",
         "psycopg2-binary",
+        "urllib3",
     ],
     license="License :: OSI Approved :: Apache Software License",
     classifiers=[
@@ -79,6 +79,7 @@ class FeedForm(forms.ModelForm):
             "categories",
             "enabled",
             "schedule",
+            "adaptive",
             "auto_publish",
         )
 
@@ -115,7 +116,9 @@ class FeedAdmin(ModelAdmin):
         "enabled",
         "auto_publish",
         "loaded",
+        "next_run",
         "failures",
+        "backoff",
         "status",
     )
 
@@ -137,6 +140,11 @@ class FeedAdmin(ModelAdmin):
         "etag",
         "last_modified",
         "status",
+        "next_run",
+        "previous_urls",
+        "interval",
+        "loads_saved",
+        "backoff",
     )
 
     actions = [
@@ -152,10 +160,12 @@ class FeedAdmin(ModelAdmin):
         for feed in queryset:
             try:
                 # force the feed to be loaded by resetting the fields
-                # used to send the Last-Modified or ETag headers.
+                # used to send the Last-Modified or ETag headers and the
+                # digest used to check whether the content changed.
 
                 feed.last_modified = None
                 feed.etag = None
+                feed.content_digest = ""
 
                 # Call load_feed at the module level so this action
                 # can be tested by mocking the function.
@@ -172,6 +182,11 @@ class FeedAdmin(ModelAdmin):
                 msg = _('There was an error loading the feed "%s"' % feed.name)
                 messages.error(request, msg)
 
+    @admin.display(description=_("Backoff"))
+    def backoff(self, obj):
+        # The delay, without the jitter, added to the schedule of a failing feed.
+        return obj.get_backoff() or "-"
+
     def get_queryset(self, request):
         return super(FeedAdmin, self).get_queryset(request)
 
@@ -16,3 +16,19 @@ class Config(AppConfig):
 
     def ready(self):
         setup_app_settings()
+
+        from django.core.signals import setting_changed
+        from django.db.models.signals import post_delete, post_save
+
+        from .caches import invalidate_article, invalidate_authors
+        from .loader import clear_hooks
+        from .models import Alias, Article, Author
+
+        for model in (Alias, Author):
+            post_save.connect(invalidate_authors, sender=model)
+            post_delete.connect(invalidate_authors, sender=model)
+
+        post_save.connect(invalidate_article, sender=Article)
+        post_delete.connect(invalidate_article, sender=Article)
+
+        setting_changed.connect(clear_hooks)
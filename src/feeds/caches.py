@@ -0,0 +1,151 @@
+"""
+Caches for the values looked up repeatedly when loading feeds.
+
+The same handful of authors appear on nearly every entry in a feed so,
+rather than look up each name, every time, the Author for each name is
+cached. The Aliases for a feed are loaded up front, with one query, and the
+other names are looked up once each time the feed is loaded. If the
+FEEDS_AUTHOR_CACHE_TIMEOUT setting is set then the results are also kept in
+the Django cache, so they can be used the next time the feed is loaded.
+
+The cache is invalidated whenever an Alias or Author is changed, for example
+when Authors are merged in the Django Admin.
+
+The URL for each Article is also cached, using the code, so following the
+link to an Article does not need to access the database. The cached URL is
+deleted when the Article is changed or deleted, and when the loader updates
+the URL from the feed.
+
+"""
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from feeds.models import Alias, Article, Author, Feed
+from feeds.models.article import fingerprint
+
+__all__ = (
+    "AuthorCache",
+    "invalidate_authors",
+    "get_article_url",
+    "invalidate_articles",
+    "invalidate_article",
+)
+
+VERSION_KEY = "feeds:authors:version"
+
+
+def get_version() -> str:
+    # A random token, rather than a counter, is used so the keys from
+    # before the version was evicted are never used again.
+    if version := cache.get(VERSION_KEY):
+        return version
+    cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+    return cache.get(VERSION_KEY, "")
+
+
+def invalidate_authors(**kwargs) -> None:
+    # Called by the post_save and post_delete signals for Alias and Author.
+    # Creating an Author cannot change which Author a name maps to, and it
+    # happens often when feeds are loaded, so it is ignored.
+    if kwargs.get("sender") is Author and kwargs.get("created"):
+        return
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+class AuthorCache:
+    """Map the names of the authors in a feed to the primary key of the Author.
+
+    A cache is created each time a feed is loaded. It is only used in the
+    thread which saves the Articles for the feed.
+
+    """
+
+    def __init__(self, feed: Feed):
+        self.feed = feed
+        self.timeout = settings.FEEDS_AUTHOR_CACHE_TIMEOUT
+        self.version = get_version() if self.timeout else ""
+        self.authors: Dict[str, int] = dict(
+            Alias.objects.filter(feed=feed).values_list("name", "author_id")
+        )
+
+    def get_key(self, name: str) -> str:
+        # Names are hashed since they can contain characters, e.g. spaces,
+        # which are not allowed in keys by some cache backends.
+        return "feeds:authors:%s:%s:%s" % (
+            self.version,
+            self.feed.pk,
+            fingerprint(name),
+        )
+
+    def get_many(self, names: List[str]) -> Dict[str, int]:
+        found = {name: self.authors[name] for name in names if name in self.authors}
+        missing = [name for name in names if name not in found]
+
+        if self.timeout and missing:
+            keys = {self.get_key(name): name for name in missing}
+            cached = {keys[key]: pk for key, pk in cache.get_many(keys).items()}
+            # The Authors could have been deleted by a process which does not
+            # share the cache, e.g. when using the local memory cache, so
+            # check they still exist before using them.
+            exists = set(
+                Author.objects.filter(pk__in=cached.values()).values_list(
+                    "pk", flat=True
+                )
+            )
+            cached = {name: pk for name, pk in cached.items() if pk in exists}
+            self.authors.update(cached)
+            found.update(cached)
+
+        return found
+
+    def set_many(self, authors: Dict[str, int]) -> None:
+        self.authors.update(authors)
+        if self.timeout and authors:
+            values = {self.get_key(name): pk for name, pk in authors.items()}
+            cache.set_many(values, self.timeout)
+
+
+def get_article_key(code: str) -> str:
+    # The code comes from the URL so it is hashed in case it contains
+    # characters which are not allowed in keys.
+    return "feeds:articles:%s" % fingerprint(code)
+
+
+def get_article_url(code: str) -> Optional[str]:
+    """Get the URL for the Article with a given code, or None if not found.
+
+    If there are Articles with duplicate codes, the URL for the latest one
+    is returned since that is the one most likely to have been clicked.
+
+    """
+    key = get_article_key(code)
+    if url := cache.get(key):
+        return url
+
+    url = (
+        Article.objects.filter(code=code)
+        .order_by("-created")
+        .values_list("url", flat=True)
+        .first()
+    )
+    if url and settings.FEEDS_ARTICLE_CACHE_TIMEOUT:
+        cache.set(key, url, settings.FEEDS_ARTICLE_CACHE_TIMEOUT)
+    return url
+
+
+def invalidate_articles(codes: Iterable[str]) -> None:
+    # The URLs are deleted once the changes are committed, otherwise a
+    # request could cache the old URL again before then.
+    if keys := [get_article_key(code) for code in codes]:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_article(**kwargs) -> None:
+    # Called by the post_save and post_delete signals for Article. Nothing
+    # is cached for an Article which has just been created.
+    if not kwargs.get("created"):
+        invalidate_articles([kwargs["instance"].code])
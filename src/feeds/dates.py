@@ -0,0 +1,82 @@
+"""
+Parse the dates found in feeds and in HTTP headers.
+
+Nearly all feeds use one of two formats: RFC 822, in RSS feeds, for example
+"Mon, 02 Oct 2023 10:00:00 +0000", or RFC 3339, in Atom feeds, for example
+"2023-10-02T10:00:00Z". Both can be parsed quickly using the standard library
+so dateutil, which handles just about anything but is much slower, is only
+used for the dates which do not follow either format.
+
+feedparser also parses the dates in a feed, so if the parsed value, a UTC
+struct_time, is available, it is used instead.
+
+The datetimes returned are always timezone-aware. Dates without a timezone
+are assumed to be UTC.
+
+"""
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import struct_time
+from typing import Optional
+
+from dateutil.parser import parse as parse_any
+
+__all__ = ("parse_date",)
+
+# RFC 3339 dates, in the form that datetime.fromisoformat() accepts on all
+# the supported versions of python, once a "Z" suffix is replaced.
+RFC_3339 = re.compile(
+    r"\d{4}-\d\d-\d\d([T ]\d\d:\d\d(:\d\d(\.\d{3}(\d{3})?)?)?([+-]\d\d:\d\d|Z)?)?$",
+    re.IGNORECASE,
+)
+
+
+def from_struct_time(value: struct_time) -> datetime:
+    return datetime(*value[:6], tzinfo=timezone.utc)
+
+
+def from_rfc_3339(value: str) -> Optional[datetime]:
+    if not RFC_3339.match(value):
+        return None
+    if value[-1] in "Zz":
+        value = value[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def from_rfc_822(value: str) -> Optional[datetime]:
+    try:
+        return parsedate_to_datetime(value)
+    except (ValueError, TypeError, IndexError):
+        return None
+
+
+def from_any(value: str) -> Optional[datetime]:
+    try:
+        return parse_any(value)
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+
+def parse_date(
+    value: Optional[str], parsed: Optional[struct_time] = None
+) -> Optional[datetime]:
+    """Parse a date, returning None if it could not be parsed."""
+    if parsed:
+        try:
+            return from_struct_time(parsed)
+        except (ValueError, TypeError):
+            pass
+
+    if not value or not (value := value.strip()):
+        return None
+
+    date = from_rfc_3339(value) or from_rfc_822(value) or from_any(value)
+
+    if date and date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return date
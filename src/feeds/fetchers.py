@@ -0,0 +1,237 @@
+"""
+Fetch the documents for RSS and Atom feeds.
+
+A fetcher makes the HTTP request for a feed and returns a Response with the
+status, headers and raw bytes of the document. The fetcher used by the loader
+is set by the FEEDS_FETCHER setting, so it can be replaced, for example, to
+route requests through a proxy service.
+
+HttpFetcher, the default, uses a pool of keep-alive connections so feeds
+published by the same site re-use the same connection. It is shared by all
+the threads that fetch feeds.
+
+"""
+import functools
+import socket
+import threading
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+import urllib3
+from urllib3.exceptions import HTTPError
+
+__all__ = (
+    "Response",
+    "FetchError",
+    "Fetcher",
+    "HttpFetcher",
+    "get_fetcher",
+    "get_user_agent",
+)
+
+
+class Response(NamedTuple):
+    """The raw response from fetching a feed.
+
+    The status is None when the document was not fetched using HTTP, for
+    example when an XML string is injected by get_source() for testing.
+    The error flag is set if the request failed, in which case there is
+    no status, headers or content. The digest is a hash of the content.
+    If it is the same as the last time the feed was loaded then the
+    unchanged flag is set and the content is discarded. If the request
+    was permanently redirected then location is the new URL for the feed.
+
+    """
+
+    url: str
+    status: Optional[int] = None
+    headers: Dict[str, str] = {}
+    content: bytes = b""
+    href: str = ""
+    error: bool = False
+    digest: str = ""
+    unchanged: bool = False
+    location: str = ""
+
+
+class FetchError(Exception):
+    """Raised when the document for a feed could not be fetched."""
+
+
+class Fetcher:
+    """The interface for the classes which fetch the document for a feed.
+
+    The ETag and Last-Modified values, from the previous fetch, are passed
+    so a conditional request can be made. If the request fails then a
+    FetchError is raised.
+
+    """
+
+    def fetch(
+        self, url: str, etag: Optional[str], modified: Optional[datetime]
+    ) -> Response:
+        raise NotImplementedError
+
+
+class HttpFetcher(Fetcher):
+    """Fetch feeds using a pool of keep-alive connections.
+
+    The connect and read timeouts apply to each request. The read timeout
+    is also used as a limit on the total time taken to read the document.
+    A timer shuts down the connection when it expires, so a read which is
+    blocked returns straight away and a server which trickles data cannot
+    tie up a thread. Documents
+    larger than FEEDS_FETCH_MAX_SIZE are discarded. Compressed responses
+    are decoded, gzip and deflate always, brotli if the brotli package is
+    installed.
+
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self):
+        self.timeout = urllib3.Timeout(
+            connect=settings.FEEDS_FETCH_CONNECT_TIMEOUT,
+            read=settings.FEEDS_FETCH_READ_TIMEOUT,
+        )
+        self.max_size = settings.FEEDS_FETCH_MAX_SIZE
+        self.pool = urllib3.PoolManager(
+            num_pools=settings.FEEDS_LOAD_WORKERS * 10,
+            maxsize=settings.FEEDS_LOAD_HOST_CONNECTIONS,
+            timeout=self.timeout,
+            # The total is not set since every redirect counts towards it,
+            # so it would limit the number of redirects followed.
+            retries=urllib3.Retry(
+                total=None, connect=1, read=0, redirect=5, status=0, other=0
+            ),
+        )
+
+    def get_headers(
+        self, etag: Optional[str], modified: Optional[datetime]
+    ) -> Dict[str, str]:
+        headers = urllib3.make_headers(
+            user_agent=get_user_agent(), accept_encoding=True
+        )
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = http_date(modified.timestamp())
+        return headers
+
+    def fetch(
+        self, url: str, etag: Optional[str], modified: Optional[datetime]
+    ) -> Response:
+        try:
+            response = self.pool.request(
+                "GET",
+                url,
+                headers=self.get_headers(etag, modified),
+                preload_content=False,
+            )
+        except HTTPError as exc:
+            raise FetchError(str(exc)) from exc
+
+        # The connection is closed if the document was not read in full so
+        # it is not re-used with data from this response still waiting.
+
+        try:
+            content = self.read(response)
+        except HTTPError as exc:
+            response.close()
+            raise FetchError(str(exc)) from exc
+        except FetchError:
+            response.close()
+            raise
+        finally:
+            response.release_conn()
+
+        return Response(
+            url=url,
+            status=response.status,
+            headers={key.lower(): value for key, value in response.headers.items()},
+            content=content,
+            href=response.geturl() or url,
+            location=self.get_location(url, response),
+        )
+
+    def get_location(self, url: str, response: urllib3.HTTPResponse) -> str:
+        # Only the permanent redirects, at the start of the chain, are
+        # followed to get the new URL for the feed. A temporary redirect
+        # means the feed should still be requested from the earlier URL.
+        location = ""
+        history = response.retries.history if response.retries else ()
+        for redirect in history:
+            if redirect.status not in (301, 308) or not redirect.redirect_location:
+                break
+            location = urljoin(redirect.url, redirect.redirect_location)
+        return location
+
+    def read(self, response: urllib3.HTTPResponse) -> bytes:
+        length = response.headers.get("content-length", "")
+        if length.isdigit() and int(length) > self.max_size:
+            raise FetchError("Content-Length exceeds %d bytes" % self.max_size)
+
+        # The socket is duplicated so the timer can shut it down even if
+        # the connection was closed, leaving only the response with a
+        # reference to it, as happens when the server does not keep the
+        # connection alive.
+        try:
+            sock = socket.fromfd(response.fileno(), socket.AF_INET, socket.SOCK_STREAM)
+        except (OSError, ValueError):
+            sock = None
+
+        expired = threading.Event()
+        timer = threading.Timer(self.timeout.read_timeout, self.abort, (sock, expired))
+        timer.start()
+        chunks = []
+        size = 0
+
+        try:
+            for chunk in response.stream(self.chunk_size, decode_content=True):
+                size += len(chunk)
+                if size > self.max_size:
+                    raise FetchError("Content exceeds %d bytes" % self.max_size)
+                chunks.append(chunk)
+        except HTTPError as exc:
+            if expired.is_set():
+                raise FetchError("Content not read in time") from exc
+            raise
+        finally:
+            timer.cancel()
+            if sock is not None:
+                sock.close()
+
+        if expired.is_set():
+            raise FetchError("Content not read in time")
+
+        return b"".join(chunks)
+
+    def abort(self, sock: Optional[socket.socket], expired: threading.Event) -> None:
+        # Called by the timer, from its own thread. Shutting down the socket
+        # wakes up the fetch thread if it is waiting for data.
+        expired.set()
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@functools.lru_cache(maxsize=None)
+def load_fetcher(path: str) -> Fetcher:
+    return import_string(path)()
+
+
+def get_fetcher() -> Fetcher:
+    # The fetcher is created once, the first time it is used, so all the
+    # requests share the same pool of connections.
+    return load_fetcher(settings.FEEDS_FETCHER)
+
+
+def get_user_agent() -> str:
+    return settings.FEEDS_USER_AGENT
@@ -1,29 +1,143 @@
+"""
+Load the entries from RSS and Atom feeds.
+
+Loading a feed is split into three stages, each of which can be run in its
+own executor so it can be scaled independently of the others:
+
+1. fetch_feed() makes the HTTP request and returns a Response with the
+   status, headers and the raw bytes of the document. It does not access
+   the database, so it can be run in a pool of I/O threads.
+
+2. parse_feed() parses the Response and returns a ParsedFeed containing
+   an Entry for each item in the feed. It only uses the Response, so it can
+   be run in a pool of processes for CPU-bound work.
+
+3. persist_feed() updates the Feed with the results of the request,
+   runs the batch filter hooks, and creates or updates an Article for each
+   Entry. This is the only stage which accesses the database.
+
+Response, ParsedFeed and Entry are simple, immutable, records so they can be
+pickled and passed between threads or processes.
+
+"""
 import logging
-from datetime import datetime
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from html import unescape
-from typing import List, Optional
-from urllib.error import HTTPError, URLError
+from itertools import islice
+from multiprocessing import get_context
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlparse
 
+import django
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator
+from django.db import DatabaseError, transaction
+from django.db.models import F
 from django.template.defaultfilters import truncatechars
 from django.utils import timezone
 from django.utils.module_loading import import_string
 from django.utils.text import slugify
 
-import feedparser  # type: ignore
-from dateutil.parser import parse as parse_date
-from feedparser import FeedParserDict
-
-from feeds.models import Alias, Article, Author, Feed, Tag
+from feeds.caches import AuthorCache, invalidate_articles
+from feeds.dates import parse_date
+from feeds.fetchers import FetchError, Response, get_fetcher, get_user_agent
+from feeds.models import Article, Author, Category, Feed, Tag
+from feeds.models.article import fingerprint, identifier_digest
+from feeds.parsers import ParseError, get_parser
+from feeds.signals import articles_added
 
-__all__ = ("load_feed", "get_user_agent")
+__all__ = (
+    "load_feeds",
+    "load_feed",
+    "fetch_feed",
+    "parse_feed",
+    "persist_feed",
+    "get_user_agent",
+)
 
 
 validate_url = URLValidator()
 log = logging.getLogger(__name__)
 
+# The longest values which can be saved for an entry.
+IDENTIFIER_LENGTH = Article._meta.get_field("identifier").max_length
+TITLE_LENGTH = Article._meta.get_field("title").max_length
+URL_LENGTH = Article._meta.get_field("url").max_length
+AUTHOR_LENGTH = Author._meta.get_field("name").max_length
+TAG_LENGTH = Tag._meta.get_field("name").max_length
+
+
+class Entry(NamedTuple):
+    """The values, from an item in a feed, used to create an Article.
+
+    Entries are created, in a single pass over the item returned by the
+    parser, by from_item(), so the item can be discarded straight away.
+
+    """
+
+    identifier: str
+    title: str
+    summary: str
+    url: str
+    published: Optional[datetime]
+    authors: List[str]
+    tags: List[str]
+
+    @classmethod
+    def from_item(cls, item: Dict) -> "Entry":
+        # FeedParserDict maps alternative names for keys, e.g. description
+        # to summary, on every lookup. The values are always stored under
+        # the canonical names, so the dict is read directly, once for each
+        # value.
+        get = partial(dict.get, item)
+
+        link = get("link", "")
+
+        return cls(
+            # Use the entry link as a last resort as the feed would likely
+            # fail validation. This happens surprisingly often.
+            identifier=get("id", link),
+            # Some feeds, e.g. cartoons, might just contain an image so there
+            # is no title.
+            title=filter_title(unescape(get("title", ""))),
+            summary=unescape(get("summary", "")),
+            url=get_url(link),
+            published=parse_date(get("published"), get("published_parsed")),
+            authors=filter_authors(
+                [name for author in get("authors", ()) if (name := author.get("name"))]
+            ),
+            tags=filter_tags(
+                sorted(term for tag in get("tags", ()) if (term := tag.get("term")))
+            ),
+        )
+
+
+class ParsedFeed(NamedTuple):
+    """The entries parsed from a Response.
+
+    The Response is included, without the content, so the results of the
+    request can be recorded on the Feed. The list of entries is empty if
+    the document was not parsed, e.g. the feed was unchanged. If the
+    document could not be parsed then error contains the reason.
+
+    """
+
+    response: Response
+    entries: List[Entry] = []
+    error: Optional[str] = None
+
 
 def load_feeds() -> None:
     now = timezone.now()
@@ -31,13 +145,187 @@ def load_feeds() -> None:
 
     log.info("Feeds scheduled")
 
-    for feed in feeds:
-        load_feed(feed)
+    # Fetching the feeds is where nearly all the time goes so the requests
+    # are made concurrently using a pool of threads. The threads do not
+    # access the database. The documents are parsed in the same threads,
+    # or, in a pool of processes, if FEEDS_LOAD_PARSERS is set. The results
+    # are saved, one feed at a time, as they arrive, so only one database
+    # connection is used.
+    #
+    # The scheduler decides when each request can be made so the limits for
+    # each host are respected. Feeds are only handed to the pool when they
+    # can be fetched immediately, so a thread is never left waiting on a
+    # busy host while feeds from other hosts are ready.
+
+    workers = settings.FEEDS_LOAD_WORKERS
+    scheduler = HostScheduler(
+        list(feeds),
+        connections=settings.FEEDS_LOAD_HOST_CONNECTIONS,
+        rate=settings.FEEDS_LOAD_HOST_RATE,
+        window=settings.FEEDS_LOAD_HOST_WINDOW,
+    )
+
+    with ExitStack() as stack:
+        fetchers = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+
+        if settings.FEEDS_LOAD_PARSERS:
+            # Processes are spawned rather than forked so they do not share
+            # the database connection already opened in this process.
+            parsers = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=settings.FEEDS_LOAD_PARSERS,
+                    mp_context=get_context("spawn"),
+                    initializer=django.setup,
+                )
+            )
+        else:
+            parsers = fetchers
+
+        futures: Dict[Future, Feed] = {}
+        fetches: Set[Future] = set()
+
+        while futures or scheduler.pending():
+            capacity = workers - len(fetches)
+            for feed in scheduler.ready(time.monotonic(), capacity):
+                future = fetchers.submit(fetch_feed, feed)
+                futures[future] = feed
+                fetches.add(future)
+
+            # Wait for a request to finish or for the next time a request
+            # can be made to a host, whichever comes first.
+            timeout = None
+            if len(fetches) < workers:
+                timeout = scheduler.delay(time.monotonic())
+
+            if not futures:
+                time.sleep(timeout or 0)
+                continue
+
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                feed = futures.pop(future)
+                if future in fetches:
+                    fetches.remove(future)
+                    scheduler.done(feed)
+                try:
+                    result = future.result()
+                    if isinstance(result, Response):
+                        futures[parsers.submit(parse_feed, result)] = feed
+                    else:
+                        persist_feed(feed, result)
+                except Exception:  # noqa
+                    # Don't let one feed with a problem we have not seen yet
+                    # stop the rest from being loaded. The failure is recorded,
+                    # like a request error, so the feed is rescheduled and backs
+                    # off rather than being loaded again every time.
+                    log.exception("Feed not loaded", extra={"feed": feed.name})
+                    record_failure(feed)
 
     log.info("Feeds loaded")
 
 
+def record_failure(feed: Feed) -> None:
+    # The Feed may have been partly updated before the error so the
+    # latest values are loaded before the failure is saved.
+    now = timezone.now()
+    try:
+        feed.refresh_from_db()
+        feed.status = 400
+        feed.failures += 1
+        feed.reschedule(now)
+        feed.save()
+    except (DatabaseError, Feed.DoesNotExist):
+        log.exception("Feed failure not saved", extra={"feed": feed.name})
+
+
+class HostScheduler:
+    """Decide when the request for each feed can be made.
+
+    Sites often publish more than one feed, e.g. newspapers, so to avoid
+    looking like a denial of service attack, the number of simultaneous
+    connections and the number of requests per second to each host are
+    capped. If a window, in seconds, is given, the requests to each host
+    are also spread evenly across it. Hosts are taken in turn, so feeds
+    from sites that publish many do not hold up the others.
+
+    The scheduler is only used from the thread which runs load_feeds(), or
+    by the Celery task which dispatches a task for each feed, in which case
+    the delay before each request is set when the task is sent.
+
+    """
+
+    def __init__(self, feeds: List[Feed], connections: int, rate: float, window: float):
+        self.connections = connections
+        self.queues: Dict[str, Deque[Feed]] = {}
+        for feed in feeds:
+            self.queues.setdefault(get_host(feed), deque()).append(feed)
+
+        self.active: Dict[str, int] = {host: 0 for host in self.queues}
+        self.next_start: Dict[str, float] = {host: 0.0 for host in self.queues}
+        self.spacing: Dict[str, float] = {}
+        for host, queue in self.queues.items():
+            interval = 1.0 / rate if rate else 0.0
+            spread = window / len(queue) if window else 0.0
+            self.spacing[host] = max(interval, spread)
+
+    def pending(self) -> bool:
+        return any(self.queues.values())
+
+    def is_ready(self, host: str, now: float) -> bool:
+        return (
+            bool(self.queues[host])
+            and self.active[host] < self.connections
+            and self.next_start[host] <= now
+        )
+
+    def ready(self, now: float, limit: int) -> List[Feed]:
+        # Take one feed from each host that is ready, in turn, until the
+        # limit is reached or no more hosts are ready.
+        feeds: List[Feed] = []
+        while len(feeds) < limit:
+            hosts = [host for host in self.queues if self.is_ready(host, now)]
+            if not hosts:
+                break
+            for host in hosts[: limit - len(feeds)]:
+                feeds.append(self.queues[host].popleft())
+                self.active[host] += 1
+                self.next_start[host] = now + self.spacing[host]
+        return feeds
+
+    def done(self, feed: Feed) -> None:
+        self.active[get_host(feed)] -= 1
+
+    def delay(self, now: float) -> Optional[float]:
+        # The time until the next host, which is not at its limit for
+        # connections, can be sent a request.
+        times = [
+            self.next_start[host]
+            for host, queue in self.queues.items()
+            if queue and self.active[host] < self.connections
+        ]
+        return max(min(times) - now, 0.0) if times else None
+
+    def countdowns(self) -> List[Tuple[Feed, float]]:
+        # The delay, in seconds, before each feed is fetched, when each one
+        # is loaded by a separate task, so the requests to each host are
+        # spaced out by the rate and window. The tasks run independently,
+        # so the limit on connections to each host cannot be applied.
+        return [
+            (feed, idx * self.spacing[host])
+            for host, queue in self.queues.items()
+            for idx, feed in enumerate(queue)
+        ]
+
+
+def get_host(feed: Feed) -> str:
+    return urlparse(feed.url).hostname or ""
+
+
 def load_feed(feed: Feed) -> bool:
+    return persist_feed(feed, parse_feed(fetch_feed(feed)))
+
+
+def fetch_feed(feed: Feed) -> Response:
     # The Last-Modified and ETag headers, from the previous fetch, are
     # sent when fetching a feed, so we only load entries if the feed
     # has been updated.
@@ -47,6 +335,9 @@ def load_feed(feed: Feed) -> bool:
     # server errors since it will probably have been resolved by the
     # next fetch.
 
+    # IMPORTANT: this function is called from multiple threads when the
+    # feeds are loaded by load_feeds(), so it must not access the database.
+
     url = feed.url
     etag = feed.etag
     modified = feed.last_modified
@@ -56,25 +347,89 @@ def load_feed(feed: Feed) -> bool:
         extra={"feed": feed.name, "url": url, "last_modified": modified, "etag": etag},
     )
 
+    source = get_source(feed)
+
+    if urlparse(source).scheme not in ("http", "https"):
+        response = Response(url=url, content=source.encode("utf-8"))
+    else:
+        try:
+            response = get_fetcher().fetch(source, etag, modified)
+        except FetchError:
+            log.exception("Feed not fetched", extra={"feed": feed.name})
+            return Response(url=url, error=True)
+
+        response = response._replace(url=url)
+
+    return check_digest(feed, response)
+
+
+def check_digest(feed: Feed, response: Response) -> Response:
+    # Many feeds do not send either the ETag or Last-Modified headers so
+    # a conditional fetch always returns the document. Comparing a hash
+    # of the content with the one from the last time the feed was loaded
+    # means the document is only parsed if it has actually changed.
+
+    if not response.content:
+        return response
+
+    digest = fingerprint(response.content)
+
+    if digest == feed.content_digest:
+        return response._replace(content=b"", digest=digest, unchanged=True)
+
+    return response._replace(digest=digest)
+
+
+def parse_feed(response: Response) -> ParsedFeed:
+    # Only parse the document if one was returned. The status checks are
+    # repeated, with logging, when the results are saved.
+
+    if response.error or response.unchanged or response.status == 304:
+        return ParsedFeed(response._replace(content=b""))
+
+    if response.status and response.status != 200:
+        return ParsedFeed(response._replace(content=b""))
+
+    # Relative links are resolved using the url of the document. That is
+    # not available when parsing bytes so it is passed in as a header.
+
+    headers = dict(response.headers)
+    if response.href:
+        headers.setdefault("content-location", response.href)
+
+    # The number of entries can be limited so the time taken to process
+    # very large feeds is bounded. The streaming parser stops reading the
+    # document once the limit is reached.
+
+    limit = settings.FEEDS_MAX_ENTRIES or None
+
     try:
-        response = feedparser.parse(
-            get_source(feed), agent=get_user_agent(), modified=modified, etag=etag
-        )
-    except (HTTPError, URLError):
+        items = get_parser().parse(response.content, headers)
+        entries = [Entry.from_item(item) for item in islice(items, limit)]
+    except ParseError as exc:
+        return ParsedFeed(response._replace(content=b""), error=str(exc))
+
+    return ParsedFeed(response._replace(content=b""), entries)
+
+
+def persist_feed(feed: Feed, parsed: ParsedFeed) -> bool:
+    response = parsed.response
+    now = timezone.now()
+
+    if response.error:
         # Update the feed status to a generic request error so it always reflects
         # the state of the latest request.
-        log.exception("Feed not fetched", extra={"feed": feed.name})
         feed.status = 400
         feed.failures += 1
+        feed.reschedule(now)
         feed.save()
         return False
 
     # The status field is not present in the response when a feed
     # is loaded from a string or a file.
 
-    status = response.get("status")
-    value = response.headers.get("last-modified")
-    modified = parse_date(value) if value else None
+    status = response.status
+    modified = parse_date(response.headers.get("last-modified"))
     etag = response.headers.get("etag")
     content_length = response.headers.get("content-length")
 
@@ -86,15 +441,22 @@ def load_feed(feed: Feed) -> bool:
             "last_modified": modified,
             "etag": etag,
             "content_length": content_length,
-            "href": getattr(response, "href", ""),
+            "href": response.href,
         },
     )
 
-    if status == 304:
+    # If the feed has moved permanently then use the new URL from now on,
+    # but only once the document has been fetched from it successfully.
+
+    if response.location and status in (200, 304):
+        feed.move_to(response.location)
+
+    if status == 304 or response.unchanged:
         # Explicitly log when a feed is unchanged, so we know everything was ok
         log.info("Feed is unchanged", extra={"feed": feed.name})
         feed.status = status
         feed.failures = 0
+        feed.reschedule(now)
         feed.save()
         return False
 
@@ -109,43 +471,40 @@ def load_feed(feed: Feed) -> bool:
         log.error("Feed not loaded", extra={"feed": feed.name})
         feed.status = status
         feed.failures += 1
+        feed.reschedule(now, get_retry_after(response, now))
         feed.save()
         return False
 
-    # One source of feed parsing failures is non-printing characters, which
-    # presumably were the copy and pasted into the post when it was created.
-    # We don't want abandon the load at this point as it might be something
-    # that the feed author can correct and since we're having trouble other
-    # people are as well, so it's worth contacting them over this.
-
-    if response.bozo:
-        exc = response.get("bozo_exception", None)
-        log.error("Feed not parsed", exc_info=exc, extra={"feed": feed.name})
+    if parsed.error is not None:
+        log.error("Feed not parsed", extra={"feed": feed.name, "error": parsed.error})
         feed.status = status
         feed.failures += 1
+        feed.reschedule(now)
         feed.save()
         return False
 
     feed.status = status
     feed.etag = etag
     feed.last_modified = modified
-    feed.loaded = timezone.now()
+    feed.loaded = now
     feed.failures = 0
-    feed.save()
-
-    for item in response.entries:
-        create_or_update_article(
-            feed,
-            get_identifier(item),
-            get_title(item),
-            get_summary(item),
-            get_url(item),
-            get_published(item),
-            get_names(item),
-            get_tags(item),
-        )
+    feed.content_digest = response.digest
+    feed.reschedule(now)
+
+    # The batch hooks are run here, rather than when the feed is parsed, so
+    # they can access the database, for example, to load a list of words to
+    # remove.
+
+    entries = filter_entries(parsed.entries)
+
+    # The Feed and the Articles are saved in a single transaction so the
+    # changes are committed together and a feed is never left half-loaded.
 
-    log.info("Feed was loaded", extra={"feed": feed.name})
+    with transaction.atomic():
+        feed.save()
+        counts = save_articles(feed, entries)
+
+    log.info("Feed was loaded", extra={"feed": feed.name, **counts})
 
     return True
 
@@ -156,28 +515,23 @@ def get_source(feed: Feed) -> str:
     return feed.url
 
 
-def get_user_agent() -> str:
-    return settings.FEEDS_USER_AGENT
-
+def get_retry_after(response: Response, timestamp: datetime) -> Optional[timedelta]:
+    # Servers may send a Retry-After header, either a number of seconds or
+    # a date, when a feed is rate-limited or temporarily unavailable.
+    if response.status not in (429, 503):
+        return None
+    if not (value := response.headers.get("retry-after", "").strip()):
+        return None
+    if value.isdigit():
+        return timedelta(seconds=int(value))
+    if date := parse_date(value):
+        return date - timestamp
+    return None
 
-def get_identifier(item: FeedParserDict) -> str:
-    # Use the entry link as a last resort as the feed would likely fail
-    # validation. This happens surprisingly often.
-    return item.get("id", item.get("link", ""))
 
-
-def get_title(item: FeedParserDict) -> str:
-    # Some feeds, e.g. cartoons, might just contain an image so there is no title
-    title = unescape(item.get("title", ""))
-    if getattr(settings, "FEEDS_FILTER_TITLE", None):
-        processor = import_string(settings.FEEDS_FILTER_TITLE)
-        title = processor(title)
-    return title
-
-
-def get_url(item: FeedParserDict) -> str:
+def get_url(link: str) -> str:
     try:
-        if link := item.get("link", ""):
+        if link:
             validate_url(link)
     except ValidationError:
         link = ""
@@ -185,100 +539,163 @@ def get_url(item: FeedParserDict) -> str:
     return link
 
 
-def get_published(item: FeedParserDict) -> datetime:
-    if date := item.get("published", None):
-        date = parse_date(date)
-    return date
+# The filter hooks are imported the first time they are used rather than
+# for every entry. The cache is cleared if the settings are changed, e.g.
+# in tests.
+hooks: Dict[str, Optional[Callable]] = {}
 
 
-def get_updated(item: FeedParserDict) -> datetime:
-    if date := item.get("updated", None):
-        date = parse_date(date)
-    return date
+def batch(func: Callable) -> Callable:
+    """Mark a filter hook as one that is called once for each feed.
 
+    A batch hook is called with a list of the values for all the entries
+    in a feed, rather than each value in turn, and returns a list with the
+    filtered values in the same order. That way any expensive set-up, for
+    example, loading a list of words from the database, is only done once.
 
-def get_summary(item: FeedParserDict) -> str:
-    return unescape(item.get("summary", ""))
+    """
+    func.batch = True  # type: ignore
+    return func
 
 
-def get_names(item: FeedParserDict) -> List[str]:
-    names: List[str] = [
-        author.get("name")  # noqa
-        for author in item.get("authors", [])
-        if author.get("name")  # noqa
-    ]
-    if getattr(settings, "FEEDS_FILTER_AUTHORS", None):
-        processor = import_string(settings.FEEDS_FILTER_AUTHORS)
-        names = processor(names)
+def get_hook(name: str) -> Optional[Callable]:
+    if name not in hooks:
+        path = getattr(settings, name, None)
+        hooks[name] = import_string(path) if path else None
+    return hooks[name]
+
+
+def get_entry_hook(name: str) -> Optional[Callable]:
+    hook = get_hook(name)
+    return None if getattr(hook, "batch", False) else hook
+
+
+def get_batch_hook(name: str) -> Optional[Callable]:
+    hook = get_hook(name)
+    return hook if getattr(hook, "batch", False) else None
+
+
+def clear_hooks(setting: str, **kwargs) -> None:
+    # Called by the setting_changed signal.
+    if setting.startswith("FEEDS_FILTER_"):
+        hooks.clear()
+
+
+def filter_title(title: str) -> str:
+    if hook := get_entry_hook("FEEDS_FILTER_TITLE"):
+        title = hook(title)
+    return title
+
+
+def filter_authors(names: List[str]) -> List[str]:
+    if hook := get_entry_hook("FEEDS_FILTER_AUTHORS"):
+        names = hook(names)
     return names
 
 
-def get_tags(item: FeedParserDict) -> List[str]:
-    tags = sorted([tag.get("term") for tag in item.get("tags", []) if tag.get("term")])
-    if getattr(settings, "FEEDS_FILTER_TAGS", None):
-        processor = import_string(settings.FEEDS_FILTER_TAGS)
-        tags = processor(tags)
+def filter_tags(tags: List[str]) -> List[str]:
+    if hook := get_entry_hook("FEEDS_FILTER_TAGS"):
+        tags = hook(tags)
     return tags
 
 
-def article_with_identifier(identifier: str) -> tuple[Article, bool]:
-    if Article.objects.with_identifier(identifier).exists():
-        article = Article.objects.with_identifier(identifier).get()
-        created = False
-    else:
-        article = Article(identifier=identifier)
-        created = True
-    return article, created
+def filter_entries(entries: List[Entry]) -> List[Entry]:
+    # The hooks for the title, authors and tags, which are called for each
+    # entry, are run when the Entry is created, as the feed is parsed. Here,
+    # as the entries are saved, the batch hooks for the title, authors and
+    # tags are run, followed by the hook for the entries, whether it is
+    # called for each entry or once for the feed.
 
+    if hook := get_batch_hook("FEEDS_FILTER_TITLE"):
+        values = hook([entry.title for entry in entries])
+        entries = [entry._replace(title=v) for entry, v in zip(entries, values)]
 
-def authors_for_names(feed: Feed, names: List[str]) -> List[int]:
-    authors: List[int] = []
+    if hook := get_batch_hook("FEEDS_FILTER_AUTHORS"):
+        values = hook([entry.authors for entry in entries])
+        entries = [entry._replace(authors=v) for entry, v in zip(entries, values)]
 
-    for name in names:
-        author: Optional[Author]
-        alias: Optional[Alias] = Alias.objects.filter(name=name, feed=feed).first()
+    if hook := get_batch_hook("FEEDS_FILTER_TAGS"):
+        values = hook([entry.tags for entry in entries])
+        entries = [entry._replace(tags=v) for entry, v in zip(entries, values)]
 
-        if alias:
-            author = alias.author
-        else:
-            slug: str = slugify(name)
+    if hook := get_batch_hook("FEEDS_FILTER_ENTRY"):
+        entries = [entry for entry in hook(entries) if entry]
+    elif hook := get_entry_hook("FEEDS_FILTER_ENTRY"):
+        entries = [entry for entry in map(hook, entries) if entry]
 
-            try:
-                # Check if the Author exists using the slug. That way case changes
-                # in the Author's name do not result in multiple authors.
-                author, created = Author.objects.get_or_create(
-                    slug=slug, defaults={"name": name}
-                )
-            except Author.MultipleObjectsReturned:
-                log.exception(
-                    "Multiple Authors found", extra={"feed": feed.name, "author": name}
-                )
-                author = Author.objects.with_slug(slug).first()
+    return entries
+
+
+def authors_for_names(feed: Feed, names: List[str]) -> Dict[str, int]:
+    # Get the primary key of the Author for each name. The Aliases for the
+    # feed and any names found the last time the feed was loaded are taken
+    # from the cache, so only new names are looked up.
+
+    cache = AuthorCache(feed)
+    names = list(dict.fromkeys(names))
+    authors = cache.get_many(names)
+    added: Dict[str, int] = {}
+
+    for name in names:
+        if name in authors:
+            continue
+
+        author: Optional[Author]
+        slug: str = slugify(name)
+
+        try:
+            # Check if the Author exists using the slug. That way case changes
+            # in the Author's name do not result in multiple authors.
+            author, created = Author.objects.get_or_create(
+                slug=slug, defaults={"name": name}
+            )
+        except Author.MultipleObjectsReturned:
+            log.exception(
+                "Multiple Authors found", extra={"feed": feed.name, "author": name}
+            )
+            author = Author.objects.with_slug(slug).first()
 
         if author:
-            authors.append(author.pk)
+            added[name] = author.pk
 
+    cache.set_many(added)
+    authors.update(added)
     return authors
 
 
-def tags_for_names(names: List[str]) -> List[int]:
-    tags: List[int] = []
-    for name in names:
-        tag, created = Tag.objects.get_or_create(name=name, slug=slugify(name))
-        tags.append(tag.pk)
-    return tags
+@lru_cache(maxsize=10000)
+def get_slug(name: str) -> str:
+    return slugify(name)
+
+
+def tags_for_names(names: List[str]) -> Dict[str, int]:
+    # Get the primary key of the Tag for each name. Tags are matched using
+    # the slug so changes in case do not result in multiple tags. Any
+    # missing tags are added. Feeds may be loaded in parallel, so if the
+    # same Tag was added by another loader the conflict is ignored and the
+    # Tag is fetched again.
+
+    slugs = {name: slug for name in names if (slug := get_slug(name))}
+    tags = dict(
+        Tag.objects.filter(slug__in=set(slugs.values())).values_list("slug", "pk")
+    )
 
+    missing: Dict[str, str] = {}
+    for name, slug in slugs.items():
+        if slug not in tags:
+            missing.setdefault(slug, name)
 
-def create_or_update_article(
-    feed: Feed,
-    identifier: str,
-    title: str,
-    summary: str,
-    url: str,
-    published: datetime,
-    authors: List[str],
-    tags: List[str],
-) -> None:
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slug) for slug, name in missing.items()],
+            ignore_conflicts=True,
+        )
+        tags.update(Tag.objects.filter(slug__in=missing).values_list("slug", "pk"))
+
+    return {name: tags[slug] for name, slug in slugs.items() if slug in tags}
+
+
+def is_complete(feed: Feed, entry: Entry) -> bool:
     # Simply skip over any items that are "badly formed". This is
     # preferable to simply letting exceptions be raised when saving
     # an Article as "badly formed" feed are not that unusual, so it's
@@ -286,53 +703,250 @@ def create_or_update_article(
     # at a later time, for example, an author forgets to add a title
     # to the article and publishes the post.
 
-    if not all((identifier, title, url, published)):
+    if not all((entry.identifier, entry.title, entry.url, entry.published)):
         log.info(
             "Article incomplete",
             extra={
                 "feed": feed.name,
-                "identifier": truncatechars(identifier, 20),
-                "title": truncatechars(title, 20),
-                "url": truncatechars(url, 20),
-                "date": published,
+                "identifier": truncatechars(entry.identifier, 20),
+                "title": truncatechars(entry.title, 20),
+                "url": truncatechars(entry.url, 20),
+                "date": entry.published,
             },
         )
-        return
+        return False
 
-    article: Article
-    created: bool
+    return True
 
-    article, created = article_with_identifier(identifier)
 
-    article.title = title
-    article.url = url
-    article.date = published
-    article.summary = summary
+def clean_entry(feed: Feed, entry: Entry) -> Optional[Entry]:
+    # Check the values can be saved so one entry does not cause all the
+    # Articles for a feed to be rejected. Titles and names are shortened,
+    # but changing the identifier or URL would make them useless so the
+    # entry is skipped instead. PostgreSQL does not allow NUL characters
+    # in text so they are removed.
 
-    if created:
-        article.feed = feed
-        article.source = feed.source
-        article.publish = feed.auto_publish
+    if len(entry.identifier) > IDENTIFIER_LENGTH or len(entry.url) > URL_LENGTH:
+        log.info(
+            "Article invalid",
+            extra={
+                "feed": feed.name,
+                "identifier": truncatechars(entry.identifier, 20),
+                "url": truncatechars(entry.url, 20),
+            },
+        )
+        return None
 
-    article.save()
+    return entry._replace(
+        title=entry.title.replace("\x00", "")[:TITLE_LENGTH],
+        summary=entry.summary.replace("\x00", ""),
+        authors=[name[:AUTHOR_LENGTH] for name in entry.authors],
+        tags=[name[:TAG_LENGTH] for name in entry.tags],
+    )
 
-    if created:
-        # Only set the authors, categories and tags for new Articles.
-        # That way any edits, for example, adding the author of a guest
-        # post, are not discarded.
 
-        article.authors.add(*authors_for_names(feed, authors))
-        article.categories.add(*feed.categories.all())
-        if feed.load_tags:
-            article.tags.add(*tags_for_names(tags))
+def get_fingerprint(entry: Entry) -> str:
+    # Only the values copied to an Article are used. Whitespace is
+    # normalised so reformatting the feed does not count as a change.
+    # The date is converted to a timestamp so a change of timezone is
+    # ignored.
+    values = [
+        " ".join(entry.title.split()),
+        " ".join(entry.summary.split()),
+        entry.url.strip(),
+        str(entry.published.timestamp()),
+    ]
+    return fingerprint("\x00".join(values))
+
+
+def save_articles(feed: Feed, entries: List[Entry]) -> Dict[str, int]:
+    # Save all the Articles in bulk. If that fails, for example, a value is
+    # rejected by the database, then save each Article in its own savepoint
+    # so only the entries with errors are lost.
+
+    try:
+        with transaction.atomic():
+            return create_or_update_articles(feed, entries)
+    except DatabaseError:
+        log.exception("Feed articles not saved", extra={"feed": feed.name})
+
+    counts = {"added": 0, "updated": 0, "unchanged": 0}
+
+    for entry in entries:
+        try:
+            with transaction.atomic():
+                saved = create_or_update_articles(feed, [entry])
+        except DatabaseError:
+            log.exception(
+                "Article not saved",
+                extra={
+                    "feed": feed.name,
+                    "identifier": truncatechars(entry.identifier, 20),
+                },
+            )
+            continue
+
+        for key, value in saved.items():
+            counts[key] += value
+
+    return counts
+
+
+def create_or_update_articles(feed: Feed, entries: List[Entry]) -> Dict[str, int]:
+    # The Articles for all the entries in a feed are saved in bulk, so the
+    # number of queries does not depend on the number of entries. If an
+    # entry is repeated, the last one wins, as if they were saved in turn.
+    # The number of Articles added, updated and unchanged is returned.
+
+    counts = {"added": 0, "updated": 0, "unchanged": 0}
+
+    cleaned = [
+        valid
+        for entry in entries
+        if is_complete(feed, entry) and (valid := clean_entry(feed, entry))
+    ]
+    latest: Dict[str, Entry] = {entry.identifier: entry for entry in cleaned}
+
+    if not latest:
+        return counts
+
+    # Articles are found using the digest of the identifier, which is indexed.
+    # The identifiers are compared as well in case two identifiers have the
+    # same digest. Articles from all feeds are matched, so an entry which
+    # appears in several feeds, e.g. ones for each category on a site, only
+    # has one Article.
+
+    digests = [identifier_digest(identifier) for identifier in latest]
+
+    existing: Dict[str, Article] = {
+        article.identifier: article
+        for article in Article.objects.filter(identifier_digest__in=digests)
+        if article.identifier in latest
+    }
+
+    created: List[Article] = []
+    updated: List[Article] = []
+    moved: List[str] = []
+    now = timezone.now()
+
+    for identifier, entry in latest.items():
+        digest = get_fingerprint(entry)
+
+        if identifier in existing:
+            article = existing[identifier]
+            # Most feeds return all their entries each time even though only
+            # one or two are new. Skip the ones that have not changed rather
+            # than writing the same values to the database again.
+            if article.fingerprint == digest:
+                counts["unchanged"] += 1
+                continue
+            updated.append(article)
+            if article.url != entry.url:
+                moved.append(article.code)
+        else:
+            article = Article(
+                identifier=identifier,
+                identifier_digest=identifier_digest(identifier),
+                feed=feed,
+                source=feed.source,
+                publish=feed.auto_publish,
+            )
+            created.append(article)
+
+        article.title = entry.title
+        article.url = entry.url
+        article.date = entry.published
+        article.summary = entry.summary
+        article.fingerprint = digest
+        # bulk_update() does not call save() so the timestamp must be set.
+        article.modified = now
+
+    if updated:
+        Article.objects.bulk_update(
+            updated, ["title", "url", "date", "summary", "fingerprint", "modified"]
+        )
+        # bulk_update() does not send the post_save signal so the cached
+        # URLs for the Articles are deleted here.
+        invalidate_articles(moved)
 
     if created:
+        # PostgreSQL returns the primary keys so the many-to-many
+        # relationships can be added without fetching the Articles.
+        Article.objects.bulk_create(created)
+        add_relations(feed, created, latest)
+        articles_added.send(sender=Article, feed=feed, articles=created)
+
+    for article in created:
         log.info(
             "Article added",
-            extra={"feed": feed.name, "title": truncatechars(title, 20)},
+            extra={"feed": feed.name, "title": truncatechars(article.title, 20)},
         )
-    else:
+
+    for article in updated:
         log.info(
             "Article updated",
-            extra={"feed": feed.name, "title": truncatechars(title, 20)},
+            extra={"feed": feed.name, "title": truncatechars(article.title, 20)},
+        )
+
+    counts["added"] = len(created)
+    counts["updated"] = len(updated)
+
+    return counts
+
+
+def add_relations(feed: Feed, articles: List[Article], entries: Dict[str, Entry]):
+    # Only set the authors, categories and tags for new Articles.
+    # That way any edits, for example, adding the author of a guest
+    # post, are not discarded.
+
+    AuthorRelation = Article.authors.through
+    CategoryRelation = Article.categories.through
+    TagRelation = Article.tags.through
+
+    authors: List = []
+    categories: List = []
+    tags: List = []
+
+    feed_categories = list(feed.categories.all())
+    names = [
+        name for article in articles for name in entries[article.identifier].authors
+    ]
+    feed_authors = authors_for_names(feed, names)
+
+    if feed.load_tags:
+        names = [
+            name for article in articles for name in entries[article.identifier].tags
+        ]
+        feed_tags = tags_for_names(names)
+
+    for article in articles:
+        entry = entries[article.identifier]
+
+        for name in entry.authors:
+            if pk := feed_authors.get(name):
+                authors.append(AuthorRelation(article_id=article.pk, author_id=pk))
+
+        for category in feed_categories:
+            categories.append(
+                CategoryRelation(article_id=article.pk, category_id=category.pk)
+            )
+
+        if feed.load_tags:
+            for name in entry.tags:
+                if pk := feed_tags.get(name):
+                    tags.append(TagRelation(article_id=article.pk, tag_id=pk))
+
+    # The same author or tag may appear more than once in an entry so
+    # any duplicate rows are ignored.
+
+    AuthorRelation.objects.bulk_create(authors, ignore_conflicts=True)
+    CategoryRelation.objects.bulk_create(categories, ignore_conflicts=True)
+    TagRelation.objects.bulk_create(tags, ignore_conflicts=True)
+
+    # Tagulous keeps a count of the number of times a Category is used.
+    # Since the relations were added directly it must be updated here.
+
+    if feed_categories:
+        Category.objects.filter(pk__in=[obj.pk for obj in feed_categories]).update(
+            count=F("count") + len(articles)
         )
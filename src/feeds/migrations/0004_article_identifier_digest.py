@@ -0,0 +1,51 @@
+# Generated by Django 3.2.21 on 2023-10-20 09:12
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def set_identifier_digest(apps, schema_editor):
+    # The model's save() method is not available in a migration so the
+    # digest is calculated here. See feeds.models.article.identifier_digest.
+    Article = apps.get_model("feeds", "Article")
+    batch = []
+
+    for article in Article.objects.only("pk", "identifier").iterator():
+        digest = hashlib.blake2b(article.identifier.encode(), digest_size=16)
+        article.identifier_digest = digest.hexdigest()
+        batch.append(article)
+
+        if len(batch) == 1000:
+            Article.objects.bulk_update(batch, ["identifier_digest"])
+            batch = []
+
+    Article.objects.bulk_update(batch, ["identifier_digest"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0003_auto_20231013_0254"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="identifier_digest",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="A hash of the identifier, used to find the Article quickly",
+                max_length=32,
+                verbose_name="Identifier digest",
+            ),
+        ),
+        migrations.RunPython(set_identifier_digest, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["feed", "identifier_digest"],
+                name="feeds_article_identifier_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2023-10-20 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0004_article_identifier_digest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="A hash of the feed entry, used to see if it has changed",
+                max_length=32,
+                verbose_name="Fingerprint",
+            ),
+        ),
+    ]
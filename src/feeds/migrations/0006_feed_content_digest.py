@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2023-10-21 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0005_article_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="content_digest",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="A hash of the feed the last time it was loaded",
+                max_length=32,
+                verbose_name="Content digest",
+            ),
+        ),
+    ]
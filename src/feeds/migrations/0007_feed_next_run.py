@@ -0,0 +1,46 @@
+# Generated by Django 3.2.21 on 2023-10-22 14:05
+
+import datetime as dt
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+from croniter import croniter
+
+
+def set_next_run(apps, schema_editor):
+    # The model's methods are not available in a migration so the next
+    # run is calculated here. See feeds.models.feed.Feed.get_next_run.
+    Feed = apps.get_model("feeds", "Feed")
+    now = timezone.now()
+
+    for feed in Feed.objects.all():
+        schedule = feed.schedule or settings.FEEDS_LOAD_SCHEDULE
+        # Feeds with an invalid schedule are skipped, as they are in
+        # Feed.save(), so one bad value does not stop the migration.
+        if not croniter.is_valid(schedule):
+            continue
+        feed.next_run = croniter(schedule, now).get_next(dt.datetime)
+        feed.save(update_fields=["next_run"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0006_feed_content_digest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="next_run",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="The time the feed is next scheduled to be loaded",
+                null=True,
+                verbose_name="Next run",
+            ),
+        ),
+        migrations.RunPython(set_next_run, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.21 on 2023-10-23 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0007_feed_next_run"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="adaptive",
+            field=models.BooleanField(
+                default=False,
+                help_text="Schedule the feed from how often it publishes Articles. "
+                "The schedule is used until there are enough Articles.",
+                verbose_name="Adaptive",
+            ),
+        ),
+        migrations.AddField(
+            model_name="feed",
+            name="interval",
+            field=models.DurationField(
+                blank=True,
+                editable=False,
+                help_text="The time between loads learned from the feed's Articles",
+                null=True,
+                verbose_name="Interval",
+            ),
+        ),
+        migrations.AddField(
+            model_name="feed",
+            name="loads_saved",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="The number of scheduled loads skipped by the adaptive schedule",
+                verbose_name="Loads saved",
+            ),
+        ),
+    ]
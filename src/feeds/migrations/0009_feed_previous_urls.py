@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2023-10-23 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0008_feed_adaptive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="previous_urls",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                editable=False,
+                help_text="The URLs the feed was moved from, oldest first",
+                verbose_name="Previous URLs",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.21 on 2023-10-24 10:15
+
+from django.db import migrations
+
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0009_feed_previous_urls"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tag",
+            name="slug",
+            field=django_extensions.db.fields.AutoSlugField(
+                blank=True,
+                editable=True,
+                help_text="The slug uniquely identifying the tag. Generated automatically when field is left blank.",
+                max_length=100,
+                overwrite_on_add=False,
+                populate_from="name",
+                unique=True,
+                verbose_name="Slug",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.21 on 2023-10-25 09:40
+
+from django.db import migrations, models
+
+import feeds.models.article
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0010_alter_tag_slug"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="article",
+            name="code",
+            field=models.CharField(
+                db_index=True,
+                default=feeds.models.article.article_code,
+                help_text="The code that used to identify the article",
+                max_length=6,
+                verbose_name="Code",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2023-10-26 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0011_alter_article_code"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="article",
+            name="feeds_article_identifier_idx",
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["identifier_digest", "feed"],
+                name="feeds_article_identifier_idx",
+            ),
+        ),
+    ]
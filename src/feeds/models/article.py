@@ -1,7 +1,9 @@
 import datetime as dt
+import hashlib
+from typing import Dict, Union
 
 from django.db import models
-from django.db.models import F
+from django.db.models import Case, F, Value, When
 from django.utils.crypto import get_random_string
 from django.utils.translation import gettext_lazy as _
 
@@ -13,6 +15,20 @@ def article_code():
     return get_random_string(6)
 
 
+def fingerprint(value: Union[str, bytes]) -> str:
+    # A compact, fixed-width, digest of a string. It is not used for
+    # security so a fast hash function is fine.
+    if isinstance(value, str):
+        value = value.encode()
+    return hashlib.blake2b(value, digest_size=16).hexdigest()
+
+
+def identifier_digest(identifier: str) -> str:
+    # The identifier can be up to 2000 characters long so a fixed-width
+    # digest is indexed instead.
+    return fingerprint(identifier)
+
+
 class ArticleQuerySet(models.QuerySet):
     def published(self) -> "ArticleQuerySet":
         return self.filter(publish=True)
@@ -35,12 +51,28 @@ class ArticleQuerySet(models.QuerySet):
     def with_code(self, code) -> "Article":
         return self.filter(code=code).latest("created")
 
-    def with_identifier(self, identifier) -> "ArticleQuerySet":
-        return self.filter(identifier=identifier)
+    def with_identifier(self, identifier, feed=None) -> "ArticleQuerySet":
+        # The digest is used to find the matching rows using the index. The
+        # identifier is also compared, in the unlikely event of a collision.
+        queryset = self.filter(
+            identifier_digest=identifier_digest(identifier), identifier=identifier
+        )
+        if feed is not None:
+            queryset = queryset.filter(feed=feed)
+        return queryset
 
     def viewed(self, code) -> None:
         self.filter(code=code).update(views=F("views") + 1)
 
+    def add_views(self, counts: Dict[str, int]) -> int:
+        # Add the number of views for each code with a single UPDATE.
+        views = Case(
+            *[When(code=code, then=Value(count)) for code, count in counts.items()],
+            default=Value(0),
+            output_field=models.PositiveIntegerField(),
+        )
+        return self.filter(code__in=counts).update(views=F("views") + views)
+
 
 ArticleManager = models.Manager.from_queryset(ArticleQuerySet)  # type: ignore
 
@@ -50,6 +82,12 @@ class Article(TimeStampedModel):
         verbose_name = _("Article")
         verbose_name_plural = _("Articles")
         get_latest_by = "date"
+        indexes = [
+            models.Index(
+                fields=["identifier_digest", "feed"],
+                name="feeds_article_identifier_idx",
+            ),
+        ]
 
     title = models.CharField(
         verbose_name=_("Title"),
@@ -75,6 +113,7 @@ class Article(TimeStampedModel):
         help_text=_("The code that used to identify the article"),
         max_length=6,
         default=article_code,
+        db_index=True,
     )
 
     archive_url = models.URLField(
@@ -122,6 +161,22 @@ class Article(TimeStampedModel):
         blank=True,
     )
 
+    identifier_digest = models.CharField(
+        verbose_name=_("Identifier digest"),
+        help_text=_("A hash of the identifier, used to find the Article quickly"),
+        max_length=32,
+        blank=True,
+        editable=False,
+    )
+
+    fingerprint = models.CharField(
+        verbose_name=_("Fingerprint"),
+        help_text=_("A hash of the feed entry, used to see if it has changed"),
+        max_length=32,
+        blank=True,
+        editable=False,
+    )
+
     comment = models.TextField(
         verbose_name=_("Comment"),
         help_text=_("An editorial comment about the article"),
@@ -171,6 +226,10 @@ class Article(TimeStampedModel):
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.identifier_digest = identifier_digest(self.identifier)
+        super().save(*args, **kwargs)
+
     def has_authors(self):
         names = [author.name for author in self.authors.all()]
         return names and " ".join(names) != self.source.name
@@ -1,15 +1,22 @@
 import datetime as dt
-from typing import List
+import logging
+import random
+import statistics
+from typing import Any, Dict, Optional
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 import tagulous  # type: ignore
 from croniter import croniter
 from django_extensions.db.models import TimeStampedModel
 
+log = logging.getLogger(__name__)
+
 
 def validate_crontab(value):
     if not croniter.is_valid(value):
@@ -18,16 +25,6 @@ def validate_crontab(value):
             params={"value": value},
         )
 
-    minutes = value.split()[0]
-
-    if minutes != "0" and minutes != "*":
-        raise ValidationError(
-            _(
-                "The celery task to load feeds runs every hour on the hour"
-                "so the minutes field (the first) must be set to '0' or '*'"
-            )
-        )
-
 
 class FeedQuerySet(models.QuerySet):
     def disabled(self) -> "FeedQuerySet":
@@ -36,13 +33,13 @@ class FeedQuerySet(models.QuerySet):
     def enabled(self) -> "FeedQuerySet":
         return self.filter(enabled=True)
 
-    def scheduled_for(self, timestamp: dt.datetime) -> List["Feed"]:
-        feeds: List["Feed"] = []
-        for feed in Feed.objects.enabled():
-            schedule: str = feed.schedule or settings.FEEDS_LOAD_SCHEDULE
-            if croniter.match(schedule, timestamp):
-                feeds.append(feed)
-        return feeds
+    def scheduled_for(self, timestamp: dt.datetime) -> "FeedQuerySet":
+        # The time each feed is next due to be loaded is calculated from its
+        # schedule so, rather than check the schedules here, this is a simple
+        # query on an indexed field.
+        return self.enabled().filter(
+            Q(next_run__isnull=True) | Q(next_run__lte=timestamp)
+        )
 
 
 FeedManager = models.Manager.from_queryset(FeedQuerySet)  # type: ignore
@@ -71,6 +68,14 @@ class Feed(TimeStampedModel):  # type: ignore
         help_text=_("The URL for the RSS feed (RSS or Atom)"),
     )
 
+    previous_urls = models.JSONField(
+        verbose_name=_("Previous URLs"),
+        help_text=_("The URLs the feed was moved from, oldest first"),
+        default=list,
+        blank=True,
+        editable=False,
+    )
+
     categories = tagulous.models.TagField(
         verbose_name=_("Categories"),
         help_text=_("The categories of articles published by the feed"),
@@ -95,6 +100,30 @@ class Feed(TimeStampedModel):  # type: ignore
         blank=True,
     )
 
+    adaptive = models.BooleanField(
+        verbose_name=_("Adaptive"),
+        help_text=_(
+            "Schedule the feed from how often it publishes Articles. "
+            "The schedule is used until there are enough Articles."
+        ),
+        default=False,
+    )
+
+    interval = models.DurationField(
+        verbose_name=_("Interval"),
+        help_text=_("The time between loads learned from the feed's Articles"),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    loads_saved = models.IntegerField(
+        verbose_name=_("Loads saved"),
+        help_text=_("The number of scheduled loads skipped by the adaptive schedule"),
+        default=0,
+        editable=False,
+    )
+
     auto_publish = models.BooleanField(
         verbose_name=_("Auto Publish"),
         help_text=_("Automatically publish Articles when added from an RSS Feed"),
@@ -142,7 +171,160 @@ class Feed(TimeStampedModel):  # type: ignore
         blank=True,
     )
 
+    content_digest = models.CharField(
+        verbose_name=_("Content digest"),
+        help_text=_("A hash of the feed the last time it was loaded"),
+        max_length=32,
+        blank=True,
+        editable=False,
+    )
+
+    next_run = models.DateTimeField(
+        verbose_name=_("Next run"),
+        help_text=_("The time the feed is next scheduled to be loaded"),
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+
     objects = FeedManager()  # type: ignore
 
+    # The fields used to calculate the next run.
+    scheduling_fields = ("schedule", "adaptive")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Keep track of the fields for the schedule so the next run can be
+        # updated if they change. Deferred fields are skipped since reading
+        # them would run a query for every instance.
+        self._scheduling = self.get_scheduling()
+
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        # The schedule is validated in forms, so check it is valid to avoid
+        # raising an exception if it is set directly.
+        if self.next_run is None or self.scheduling_changed():
+            now = timezone.now()
+            if self.adaptive and self.pk:
+                self.interval = self.get_interval(now)
+            if croniter.is_valid(self.get_schedule()):
+                self.next_run = self.get_next_run(now)
+            self._scheduling = self.get_scheduling()
+        super().save(*args, **kwargs)
+
+    def get_scheduling(self) -> Dict[str, Any]:
+        return {
+            name: self.__dict__[name]
+            for name in self.scheduling_fields
+            if name in self.__dict__
+        }
+
+    def scheduling_changed(self) -> bool:
+        # A field which was deferred, when the Feed was loaded, cannot be
+        # compared so it is assumed not to have changed.
+        return any(
+            self.__dict__.get(name) != value for name, value in self._scheduling.items()
+        )
+
+    def move_to(self, url: str) -> None:
+        # Record the current URL, so the history of a feed can be traced
+        # if the site is moved again, or the redirect was a mistake.
+        if url and url != self.url:
+            log.info(
+                "Feed moved", extra={"feed": self.name, "from": self.url, "to": url}
+            )
+            self.previous_urls.append(self.url)
+            self.url = url
+
+    def get_schedule(self) -> str:
+        return self.schedule or settings.FEEDS_LOAD_SCHEDULE
+
+    def get_next_run(self, timestamp: dt.datetime) -> dt.datetime:
+        if self.adaptive and self.interval:
+            return timestamp + self.interval
+        return croniter(self.get_schedule(), timestamp).get_next(dt.datetime)
+
+    def get_interval(self, timestamp: dt.datetime) -> Optional[dt.timedelta]:
+        # The interval is the median of the times between the most recent
+        # Articles. The time since the latest Article is the lower bound,
+        # so the interval grows, up to the maximum, when a feed stops
+        # publishing.
+        dates = list(
+            self.articles.order_by("-date").values_list("date", flat=True)[
+                : settings.FEEDS_ADAPTIVE_HISTORY
+            ]
+        )
+
+        if len(dates) < settings.FEEDS_ADAPTIVE_MIN_HISTORY:
+            return None
+
+        interval = statistics.median(a - b for a, b in zip(dates, dates[1:]))
+        interval = max(interval, timestamp - dates[0])
+        minimum = dt.timedelta(minutes=settings.FEEDS_ADAPTIVE_MIN_INTERVAL)
+        maximum = dt.timedelta(minutes=settings.FEEDS_ADAPTIVE_MAX_INTERVAL)
+        return min(max(interval, minimum), maximum)
+
+    def get_scheduled_runs(self, start: dt.datetime, end: dt.datetime) -> int:
+        # The number of times the feed would be loaded, using the schedule,
+        # after start, up to and including end.
+        runs = croniter(self.get_schedule(), start)
+        count = 0
+        while runs.get_next(dt.datetime) <= end:
+            count += 1
+        return count
+
+    def get_backoff(self) -> Optional[dt.timedelta]:
+        # The delay before a failing feed is loaded again doubles with each
+        # consecutive failure, up to a limit.
+        if not self.failures:
+            return None
+        minutes = settings.FEEDS_BACKOFF_DELAY * 2 ** (self.failures - 1)
+        return dt.timedelta(minutes=min(minutes, settings.FEEDS_BACKOFF_MAX_DELAY))
+
+    def reschedule(
+        self, timestamp: dt.datetime, retry_after: Optional[dt.timedelta] = None
+    ) -> None:
+        if self.adaptive:
+            self.interval = self.get_interval(timestamp)
+
+        self.next_run = self.get_next_run(timestamp)
+
+        if self.adaptive and self.interval:
+            # Record the number of loads skipped compared with the schedule.
+            # That is negative if the feed is loaded more often.
+            saved = self.get_scheduled_runs(timestamp, self.next_run) - 1
+            self.loads_saved += saved
+            log.info(
+                "Feed rescheduled",
+                extra={
+                    "feed": self.name,
+                    "interval": self.interval,
+                    "next_run": self.next_run,
+                    "saved": saved,
+                },
+            )
+
+        if backoff := self.get_backoff():
+            # Add some jitter so feeds which failed at the same time, e.g.
+            # when the network was down, are not all retried together.
+            delay = backoff * random.uniform(0.5, 1.0)
+            if retry_after:
+                delay = max(delay, retry_after)
+            self.next_run = max(self.next_run, timestamp + delay)
+            log.info(
+                "Feed backing off",
+                extra={
+                    "feed": self.name,
+                    "failures": self.failures,
+                    "next_run": self.next_run,
+                },
+            )
+
+        limit = settings.FEEDS_DISABLE_FAILURES
+        if limit and self.failures >= limit:
+            self.enabled = False
+            log.warning(
+                "Feed disabled", extra={"feed": self.name, "failures": self.failures}
+            )
@@ -1,6 +1,7 @@
 from typing import Dict, List
 
 from django.db import models
+from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
 
 from django_extensions.db.fields import AutoSlugField
@@ -12,11 +13,13 @@ class TagQuerySet(models.QuerySet):
         return self.filter(article__in=articles)
 
     def weighted(self) -> "List[Tag]":
-        results: Dict[Tag, int] = {}
-
-        for tag in self:
-            results.setdefault(tag, 0)
-            results[tag] += 1
+        # The database counts the number of times each Tag appears, e.g.
+        # once for each Article when the queryset is filtered by Articles,
+        # so only one row is returned for each Tag.
+        results: Dict[Tag, int] = {
+            tag: tag.occurrences
+            for tag in self.order_by().annotate(occurrences=Count("pk"))
+        }
 
         counts = results.values()
 
@@ -57,6 +60,7 @@ class Tag(TimeStampedModel):  # type: ignore
         max_length=100,
         unique=True,
         editable=True,
+        overwrite_on_add=False,
     )
 
     summary = models.TextField(
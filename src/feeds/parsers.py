@@ -0,0 +1,187 @@
+"""
+Parse the documents for RSS and Atom feeds.
+
+A parser takes the raw bytes of a document and returns the items from the
+feed, one at a time, as dicts with the same keys as the entries returned by
+feedparser: id, title, summary, link, published, updated, authors and tags.
+Only the values used to create an Article are needed. The parser used by the
+loader is set by the FEEDS_PARSER setting.
+
+FeedParser, the default, uses feedparser which handles just about any feed,
+no matter how badly formed, but builds the complete document in memory.
+StreamingParser reads the document incrementally and discards each item once
+it has been returned, so the memory used stays the same no matter how many
+items there are. The trade-off is that it requires well-formed XML.
+
+"""
+import functools
+import io
+import re
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+from xml.etree.ElementTree import Element
+from xml.etree.ElementTree import ParseError as XMLParseError
+from xml.etree.ElementTree import iterparse
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+import feedparser  # type: ignore
+from feedparser.sanitizer import _sanitize_html  # type: ignore
+
+__all__ = (
+    "ParseError",
+    "Parser",
+    "FeedParser",
+    "StreamingParser",
+    "get_parser",
+)
+
+
+class ParseError(Exception):
+    """Raised when the document for a feed could not be parsed."""
+
+
+class Parser:
+    """The interface for the classes which parse the document for a feed.
+
+    The response headers are passed so the parser can get the URL of the
+    document, from the Content-Location header, to resolve relative links.
+
+    """
+
+    def parse(self, content: bytes, headers: Dict[str, str]) -> Iterator[Dict]:
+        raise NotImplementedError
+
+
+class FeedParser(Parser):
+    def parse(self, content: bytes, headers: Dict[str, str]) -> Iterator[Dict]:
+        document = feedparser.parse(io.BytesIO(content), response_headers=headers)
+
+        # One source of feed parsing failures is non-printing characters, which
+        # presumably were the copy and pasted into the post when it was created.
+        # We don't want abandon the load at this point as it might be something
+        # that the feed author can correct and since we're having trouble other
+        # people are as well, so it's worth contacting them over this.
+
+        if document.bozo:
+            raise ParseError(str(document.get("bozo_exception", "")))
+
+        return iter(document.entries)
+
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+ROOTS = ("rss", "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF", ATOM + "feed")
+ITEMS = ("item", RSS1 + "item", ATOM + "entry")
+
+# The name in an RSS author element, "joe@example.com (Joe Bloggs)".
+RSS_AUTHOR = re.compile(r"\((.+)\)")
+
+
+class StreamingParser(Parser):
+    def parse(self, content: bytes, headers: Dict[str, str]) -> Iterator[Dict]:
+        base = headers.get("content-location", "")
+        events = iterparse(io.BytesIO(content), events=("start", "end"))
+        # The elements from the root down to the current one, so each item
+        # can be removed from its parent once it has been read.
+        path: List[Element] = []
+
+        try:
+            for event, element in events:
+                if event == "start":
+                    if not path:
+                        if element.tag not in ROOTS:
+                            raise ParseError("Not an RSS or Atom feed")
+                        base = urljoin(base, element.get(XML_BASE, ""))
+                    path.append(element)
+                    continue
+
+                path.pop()
+
+                if element.tag in ITEMS:
+                    yield self.get_item(element, base)
+                    element.clear()
+                    if path:
+                        path[-1].remove(element)
+        except XMLParseError as exc:
+            raise ParseError(str(exc)) from exc
+
+    def get_item(self, element: Element, base: str) -> Dict:
+        base = urljoin(base, element.get(XML_BASE, ""))
+        item: Dict = {"authors": [], "tags": []}
+        summary: Optional[str] = None
+        content: Optional[str] = None
+
+        for child in element:
+            tag = child.tag.replace(ATOM, "").replace(RSS1, "")
+            if tag in ("id", "guid"):
+                item["id"] = self.get_text(child)
+                if tag == "guid" and child.get("isPermaLink", "true") == "true":
+                    item.setdefault("link", item["id"])
+            elif tag == "title":
+                item["title"] = self.get_text(child)
+            elif tag in ("summary", "description"):
+                summary = self.get_text(child)
+            elif tag in ("content", CONTENT + "encoded"):
+                content = self.get_text(child)
+            elif tag == "link":
+                if href := child.get("href"):
+                    if child.get("rel", "alternate") == "alternate":
+                        item["link"] = href
+                elif text := self.get_text(child):
+                    item["link"] = text
+            elif tag in ("published", "pubDate"):
+                item["published"] = self.get_text(child)
+            elif tag in ("updated", DC + "date"):
+                item["updated"] = self.get_text(child)
+            elif tag == "author":
+                if name := self.get_author(child):
+                    item["authors"].append({"name": name})
+            elif tag == DC + "creator":
+                if name := self.get_text(child):
+                    item["authors"].append({"name": name})
+            elif tag == "category":
+                if term := child.get("term") or self.get_text(child):
+                    item["tags"].append({"term": term})
+            elif tag == DC + "subject":
+                if term := self.get_text(child):
+                    item["tags"].append({"term": term})
+
+        # Like feedparser, use the content if there is no summary, and
+        # remove any unsafe markup, e.g. scripts.
+        if summary := summary or content:
+            item["summary"] = _sanitize_html(summary, "utf-8", "text/html")
+
+        if "link" in item:
+            item["link"] = urljoin(base, item["link"])
+
+        return item
+
+    def get_text(self, element: Element) -> str:
+        # Atom text constructs with type="xhtml" contain a div element
+        # rather than text so only the text of the child elements is used.
+        return "".join(element.itertext()).strip()
+
+    def get_author(self, element: Element) -> str:
+        # Atom authors have a name element, RSS authors are an email
+        # address with an optional name.
+        if (name := element.find(ATOM + "name")) is not None:
+            return self.get_text(name)
+        text = self.get_text(element)
+        if match := RSS_AUTHOR.search(text):
+            return match.group(1).strip()
+        return "" if "@" in text else text
+
+
+@functools.lru_cache(maxsize=None)
+def load_parser(path: str) -> Parser:
+    return import_string(path)()
+
+
+def get_parser() -> Parser:
+    return load_parser(settings.FEEDS_PARSER)
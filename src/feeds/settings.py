@@ -16,17 +16,14 @@ from croniter import croniter
 # runs using the FEEDS_TASK_SCHEDULE setting which defaults to run every hour
 # on the hour. Rather than fetch every feed each time you can set a schedule
 # on individual feeds to reduce server load and bandwidth. If no schedule is
-# set then the FEEDS_LOAD_SCHEDULE setting is used. When the celery task runs
-# it compares the feed's schedule with the current time and if they match,
-# the feed is loaded.
+# set then the FEEDS_LOAD_SCHEDULE setting is used. Each time a feed is saved
+# or loaded, the next time it is due to be loaded is calculated from its
+# schedule. When the celery task runs, any feeds which are due are loaded.
 #
-# IMPORTANT: the times represented by the FEEDS_TASK_SCHEDULE setting and the
-# FEEDS_LOAD_SCHEDULE setting must coincide otherwise the feed will never be
-# loaded. Since the celery task runs on the hour, you can add a little margin
-# for error by setting the minute field for the feed schedule to "*" rather
-# than "0". That way, if the task gets blocked temporarily as long as it gets
-# executed in the next 59 minutes, the schedules will match and the feed will
-# still be loaded.
+# Since finding the feeds which are due is a simple query, the task can be
+# run as often as you like, e.g. every minute, "* * * * *". The schedule for
+# a feed then sets exactly when it is loaded. If the task runs less often,
+# a feed is loaded the next time the task runs after it became due.
 
 FEEDS_TASK_SCHEDULE = os.environ.get("FEEDS_TASK_SCHEDULE", "0 * * * *")
 
@@ -38,13 +35,135 @@ FEEDS_LOAD_SCHEDULE = os.environ.get("FEEDS_LOAD_SCHEDULE", FEEDS_TASK_SCHEDULE)
 if not croniter.is_valid(FEEDS_LOAD_SCHEDULE):
     raise ImproperlyConfigured("FEEDS_LOAD_SCHEDULE setting is not a valid cron entry")
 
+# Rather than use a fixed schedule, a feed can be set to be loaded
+# adaptively, based on how often it publishes Articles. The interval
+# between loads is the median of the times between the most recent
+# FEEDS_ADAPTIVE_HISTORY Articles, or the time since the latest Article if
+# that is longer, limited to the range set by FEEDS_ADAPTIVE_MIN_INTERVAL
+# and FEEDS_ADAPTIVE_MAX_INTERVAL, in minutes.
+# Until the feed has at least FEEDS_ADAPTIVE_MIN_HISTORY Articles, the
+# schedule is used instead.
+
+FEEDS_ADAPTIVE_MIN_INTERVAL = int(os.environ.get("FEEDS_ADAPTIVE_MIN_INTERVAL", "60"))
+
+FEEDS_ADAPTIVE_MAX_INTERVAL = int(os.environ.get("FEEDS_ADAPTIVE_MAX_INTERVAL", "1440"))
+
+FEEDS_ADAPTIVE_HISTORY = int(os.environ.get("FEEDS_ADAPTIVE_HISTORY", "20"))
+
+FEEDS_ADAPTIVE_MIN_HISTORY = int(os.environ.get("FEEDS_ADAPTIVE_MIN_HISTORY", "5"))
+
+# When a feed fails to load, the delay before it is loaded again doubles
+# with each consecutive failure, starting at FEEDS_BACKOFF_DELAY minutes, up
+# to FEEDS_BACKOFF_MAX_DELAY minutes. A random amount, up to half the delay,
+# is subtracted so failing feeds are not all retried at the same time. If a
+# server sends a Retry-After header, with a 429 or 503 status, then the feed
+# is not loaded until after that time. If a feed fails to load for
+# FEEDS_DISABLE_FAILURES consecutive times it is disabled. The default, zero,
+# means feeds are never disabled.
+
+FEEDS_BACKOFF_DELAY = int(os.environ.get("FEEDS_BACKOFF_DELAY", "15"))
+
+FEEDS_BACKOFF_MAX_DELAY = int(os.environ.get("FEEDS_BACKOFF_MAX_DELAY", "1440"))
+
+FEEDS_DISABLE_FAILURES = int(os.environ.get("FEEDS_DISABLE_FAILURES", "0"))
+
+# Feeds are fetched concurrently by a pool of threads. FEEDS_LOAD_WORKERS
+# sets the size of the pool, i.e. the number of requests that can be in
+# progress at any one time. FEEDS_LOAD_HOST_CONNECTIONS limits the number
+# of those requests that can be made to the same host, which is important
+# for sites, e.g. newspapers, that publish many feeds. Only the fetching
+# is done in parallel, the Articles are saved one feed at a time so only
+# one database connection is used.
+
+FEEDS_LOAD_WORKERS = int(os.environ.get("FEEDS_LOAD_WORKERS", "10"))
+
+FEEDS_LOAD_HOST_CONNECTIONS = int(os.environ.get("FEEDS_LOAD_HOST_CONNECTIONS", "2"))
+
+# To be polite to sites which publish many feeds, FEEDS_LOAD_HOST_RATE also
+# limits the number of requests per second made to each host. Zero means
+# there is no limit. FEEDS_LOAD_HOST_WINDOW, in seconds, spreads the requests
+# for each host evenly over that period rather than making them as quickly
+# as the other limits allow. Zero, the default, means the requests are not
+# spread out. Feeds from different hosts are not affected by each other's
+# limits so the overall number of requests is still only limited by
+# FEEDS_LOAD_WORKERS. When the feeds are loaded by the celery tasks, each
+# task is delayed so the requests follow the rate and window, but since the
+# tasks run independently the limit on connections is not applied.
+
+FEEDS_LOAD_HOST_RATE = float(os.environ.get("FEEDS_LOAD_HOST_RATE", "1.0"))
+
+FEEDS_LOAD_HOST_WINDOW = float(os.environ.get("FEEDS_LOAD_HOST_WINDOW", "0"))
+
+# Parsing the feeds is CPU-bound so, if you are loading a large number of
+# feeds, it can be done in a pool of processes instead of the threads used
+# to fetch them. FEEDS_LOAD_PARSERS sets the number of processes. The default,
+# zero, parses each feed in the thread which fetched it.
+
+FEEDS_LOAD_PARSERS = int(os.environ.get("FEEDS_LOAD_PARSERS", "0"))
+
+# The feeds are fetched by the class set by FEEDS_FETCHER. The default uses
+# a pool of keep-alive connections. FEEDS_FETCH_CONNECT_TIMEOUT and
+# FEEDS_FETCH_READ_TIMEOUT set the time, in seconds, allowed to connect to
+# a server and to read the document, so a server that hangs does not block
+# a worker. Documents larger than FEEDS_FETCH_MAX_SIZE bytes are discarded.
+
+FEEDS_FETCHER = os.environ.get("FEEDS_FETCHER", "feeds.fetchers.HttpFetcher")
+
+FEEDS_FETCH_CONNECT_TIMEOUT = float(
+    os.environ.get("FEEDS_FETCH_CONNECT_TIMEOUT", "5.0")
+)
+
+FEEDS_FETCH_READ_TIMEOUT = float(os.environ.get("FEEDS_FETCH_READ_TIMEOUT", "30.0"))
+
+FEEDS_FETCH_MAX_SIZE = int(os.environ.get("FEEDS_FETCH_MAX_SIZE", str(5 * 1024 * 1024)))
+
+# The documents are parsed by the class set by FEEDS_PARSER. The default
+# uses feedparser which copes with just about any feed, however badly formed,
+# but builds the whole document in memory. Set it to
+# "feeds.parsers.StreamingParser" to read the entries one at a time, so the
+# memory used stays the same no matter how large the feed is. The feed must
+# be well-formed XML though. FEEDS_MAX_ENTRIES limits the number of entries
+# loaded from each feed. The default, zero, means there is no limit.
+
+FEEDS_PARSER = os.environ.get("FEEDS_PARSER", "feeds.parsers.FeedParser")
+
+FEEDS_MAX_ENTRIES = int(os.environ.get("FEEDS_MAX_ENTRIES", "0"))
+
+# The Author for each name in a feed is cached while the feed is loaded.
+# FEEDS_AUTHOR_CACHE_TIMEOUT sets the time, in seconds, the results are also
+# kept in the Django cache, so they can be used the next time the feed is
+# loaded. The default, zero, means they are not kept. Changing an Alias or
+# Author clears the cache.
+
+FEEDS_AUTHOR_CACHE_TIMEOUT = int(os.environ.get("FEEDS_AUTHOR_CACHE_TIMEOUT", "0"))
+
+# The URL for each Article is cached, using the code, so following the link
+# to an Article does not access the database. FEEDS_ARTICLE_CACHE_TIMEOUT
+# sets the time, in seconds, the URL is kept. The default is one day. Set
+# it to zero to always look up the Article.
+
+FEEDS_ARTICLE_CACHE_TIMEOUT = int(
+    os.environ.get("FEEDS_ARTICLE_CACHE_TIMEOUT", str(24 * 60 * 60))
+)
+
 # A default user-agent string that is used when loading RSS feeds. Some sites
 # will return an error is the user-agent is not given.
 
 FEEDS_USER_AGENT = os.environ.get("FEEDS_USER_AGENT", "Django Feeds")
 
+# The number of times each Article is viewed is counted in memory and saved
+# in bulk every FEEDS_VIEWS_FLUSH_INTERVAL seconds, or once the number of
+# views waiting to be saved reaches FEEDS_VIEWS_MAX_PENDING. Set the interval
+# to zero to update the Article every time it is viewed.
+
+FEEDS_VIEWS_FLUSH_INTERVAL = float(os.environ.get("FEEDS_VIEWS_FLUSH_INTERVAL", "10"))
+
+FEEDS_VIEWS_MAX_PENDING = int(os.environ.get("FEEDS_VIEWS_MAX_PENDING", "1000"))
+
 # The following settings provide post-load hooks to process / filter the
-# title, list of authors and list of tags for each entry in a feed.
+# title, list of authors and list of tags for each entry in a feed. A hook
+# decorated with feeds.loader.batch is called once for each feed with a
+# list of the values for all the entries.
 
 # Python path to a function which can be used to modify a title before it
 # is used to create or update an Article. For example remove any leading
@@ -80,6 +199,20 @@ FEEDS_FILTER_AUTHORS = None
 
 FEEDS_FILTER_TAGS = None
 
+# Python path to a function which is called with each Entry, after the other
+# filters, before it is used to create or update an Article. Entry is an
+# immutable NamedTuple so return a modified copy, using _replace(), or None
+# to skip the entry altogether.
+#
+# FEEDS_FILTER_ENTRY = "myapp.utils.filter_entry"
+#
+# def filter_entry(entry: Entry) -> Optional[Entry]:
+#     if "sponsored" in entry.tags:
+#         return None
+#     return entry._replace(summary="")
+
+FEEDS_FILTER_ENTRY = None
+
 # ############
 #   Tagulous
 # ############
@@ -0,0 +1,14 @@
+"""
+Signals sent when feeds are loaded.
+
+The loader saves the Articles for a feed in bulk, so the post_save signal
+is not sent for each Article. Instead, articles_added is sent, once the
+Articles and their authors, categories and tags have been saved, with the
+Feed and the list of new Articles as the feed and articles arguments.
+
+"""
+from django.dispatch import Signal
+
+__all__ = ("articles_added",)
+
+articles_added = Signal()
@@ -0,0 +1,100 @@
+"""
+Celery tasks for loading feeds.
+
+The load_feeds task is run periodically, see FEEDS_TASK_SCHEDULE. Rather than
+loading the feeds itself it dispatches a load_feed task for each feed that is
+due, so the work is spread across all the available workers. The start of
+each task is delayed so the requests to any one host follow the limits set
+by FEEDS_LOAD_HOST_RATE and FEEDS_LOAD_HOST_WINDOW.
+
+"""
+import logging
+from contextlib import contextmanager
+from functools import partial
+from typing import Iterator, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from celery import shared_task  # type: ignore
+
+from feeds import loader
+from feeds.models import Feed
+
+log = logging.getLogger(__name__)
+
+# The first key for the advisory locks on feeds, so they do not clash with
+# locks taken by other applications using the same database.
+LOCK_ID = 1717
+
+
+@shared_task
+def load_feeds() -> None:
+    now = timezone.now()
+
+    # Claim the feeds that are due by moving on the time they are next
+    # scheduled to run. That way, if the task runs again before the feeds
+    # are loaded, they are not dispatched a second time. The rows are
+    # locked, and rows which are already locked skipped, so feeds are not
+    # claimed by two runs of the task at the same time.
+
+    with transaction.atomic():
+        feeds: List[Feed] = list(
+            Feed.objects.scheduled_for(now).select_for_update(skip_locked=True)
+        )
+        for feed in feeds:
+            feed.next_run = feed.get_next_run(now)
+        Feed.objects.bulk_update(feeds, ["next_run"])
+
+        # The requests to each host are spread out, using the same limits
+        # as load_feeds() in the loader, by delaying the start of each task.
+
+        scheduler = loader.HostScheduler(
+            feeds,
+            connections=settings.FEEDS_LOAD_HOST_CONNECTIONS,
+            rate=settings.FEEDS_LOAD_HOST_RATE,
+            window=settings.FEEDS_LOAD_HOST_WINDOW,
+        )
+
+        for feed, countdown in scheduler.countdowns():
+            task = partial(load_feed.apply_async, (feed.pk,), countdown=countdown)
+            transaction.on_commit(task)
+
+    log.info("Feeds scheduled", extra={"count": len(feeds)})
+
+
+@shared_task
+def load_feed(pk: int) -> bool:
+    # An advisory lock is held while the feed is loaded so, if the runs
+    # overlap, a slow feed is never loaded twice at the same time. It is
+    # taken outside a transaction, since fetching the feed can take a long
+    # time, and only persist_feed() saves the results in a transaction.
+
+    with feed_lock(pk) as locked:
+        if not locked:
+            log.info("Feed is locked", extra={"pk": pk})
+            return False
+
+        feed = Feed.objects.filter(pk=pk).first()
+
+        if feed is None:
+            log.info("Feed was deleted", extra={"pk": pk})
+            return False
+
+        return loader.load_feed(feed)
+
+
+@contextmanager
+def feed_lock(pk: int) -> Iterator[bool]:
+    # The lock belongs to the database session, not a transaction, so it
+    # must be released, even if loading the feed fails.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [LOCK_ID, pk])
+        locked = cursor.fetchone()[0]
+    try:
+        yield locked
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [LOCK_ID, pk])
@@ -0,0 +1,68 @@
+import datetime as dt
+
+from django.utils import timezone
+
+import pytest
+
+from feeds import loader
+from feeds.caches import get_article_url
+from feeds.loader import Entry
+from feeds.tests.factories import ArticleFactory
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("use_local_cache")]
+
+
+def test_url_cached(django_assert_num_queries):
+    """The URL is only looked up the first time"""
+    article = ArticleFactory.create()
+    assert get_article_url(article.code) == article.url
+    with django_assert_num_queries(0):
+        assert get_article_url(article.code) == article.url
+
+
+def test_latest_article_used():
+    """The URL for the latest Article is used if codes are duplicated"""
+    first = ArticleFactory.create()
+    second = ArticleFactory.create(code=first.code)
+    assert get_article_url(first.code) == second.url
+
+
+def test_missing_article():
+    assert get_article_url("abcdef") is None
+
+
+def test_article_saved(django_capture_on_commit_callbacks):
+    """Changing an Article deletes the cached URL"""
+    article = ArticleFactory.create()
+    get_article_url(article.code)
+    article.url = "https://www.example.com/moved/"
+    with django_capture_on_commit_callbacks(execute=True):
+        article.save()
+    assert get_article_url(article.code) == article.url
+
+
+def test_article_deleted(django_capture_on_commit_callbacks):
+    """Deleting an Article deletes the cached URL"""
+    article = ArticleFactory.create()
+    get_article_url(article.code)
+    with django_capture_on_commit_callbacks(execute=True):
+        article.delete()
+    assert get_article_url(article.code) is None
+
+
+def test_article_loaded(django_capture_on_commit_callbacks):
+    """Updating the URL when a feed is loaded deletes the cached URL"""
+    article = ArticleFactory.create()
+    get_article_url(article.code)
+    entry = Entry(
+        identifier=article.identifier,
+        title=article.title,
+        summary=article.summary,
+        url="https://www.example.com/moved/",
+        published=timezone.now() - dt.timedelta(days=1),
+        authors=[],
+        tags=[],
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        loader.create_or_update_articles(article.feed, [entry])
+    assert get_article_url(article.code) == entry.url
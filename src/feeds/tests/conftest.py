@@ -1,3 +1,8 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+
 import pytest
 
 
@@ -9,6 +14,13 @@ def use_flexible_load_schedule(settings):
     settings.FEEDS_LOAD_SCHEDULE = "* * * * *"
 
 
+# The views for an Article are saved by a background thread which uses its
+# own database connection, so it cannot see the data created in a test.
+@pytest.fixture(autouse=True)
+def save_views_immediately(settings):
+    settings.FEEDS_VIEWS_FLUSH_INTERVAL = 0
+
+
 @pytest.fixture(autouse=True)
 def use_dummy_cache_backend(settings):
     settings.CACHES = {
@@ -16,3 +28,60 @@ def use_dummy_cache_backend(settings):
             "BACKEND": "django.core.cache.backends.dummy.DummyCache",
         }
     }
+
+
+# For tests which check what is cached. The cache is cleared afterwards
+# since its contents are not rolled back with the database.
+@pytest.fixture
+def use_local_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+    yield
+    cache.clear()
+
+
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.headers)
+        status, headers, content = self.server.routes.get(
+            self.path, (404, {}, b"Not Found")
+        )
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if isinstance(content, bytes):
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            # The content is a sequence of chunks, sent one at a time,
+            # for example, to test a server which is slow to respond.
+            self.end_headers()
+            try:
+                for chunk in content:
+                    self.wfile.write(chunk)
+            except ConnectionError:
+                pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def feed_server():
+    # A local HTTP server so fetching feeds can be tested offline. Add the
+    # status, headers and content to return for a path to the routes dict.
+    # The content is either bytes or an iterable of chunks of bytes.
+    # The headers from each request are recorded in requests.
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedRequestHandler)
+    server.routes = {}
+    server.requests = []
+    server.url = "http://127.0.0.1:%d" % server.server_port
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,56 @@
+import pytest
+
+from feeds.counters import ViewCounter
+from feeds.models import Article
+from feeds.tests.factories import ArticleFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    # The background thread is not started so the views are only saved
+    # when flush() is called.
+    monkeypatch.setattr(ViewCounter, "start", lambda self: None)
+    return ViewCounter(interval=10, max_pending=100)
+
+
+def test_views_buffered(counter):
+    """Views are not saved until the counter is flushed"""
+    article = ArticleFactory.create(views=0)
+    counter.add(article.code)
+    article.refresh_from_db()
+    assert article.views == 0
+
+
+def test_views_flushed(counter, django_assert_num_queries):
+    """The views for all the Articles are saved with one query"""
+    first, second = ArticleFactory.create_batch(2, views=0)
+    counter.add(first.code)
+    counter.add(second.code)
+    counter.add(second.code)
+
+    with django_assert_num_queries(1):
+        counter.flush()
+
+    views = dict(Article.objects.values_list("code", "views"))
+    assert views == {first.code: 1, second.code: 2}
+
+
+def test_counts_cleared(counter):
+    """Views are only saved once"""
+    article = ArticleFactory.create(views=0)
+    counter.add(article.code)
+    counter.flush()
+    counter.flush()
+    article.refresh_from_db()
+    assert article.views == 1
+
+
+def test_wakeup_when_full(counter):
+    """The background thread is woken once the maximum views are pending"""
+    counter.max_pending = 2
+    counter.add("abcdef")
+    assert not counter.wakeup.is_set()
+    counter.add("abcdef")
+    assert counter.wakeup.is_set()
@@ -0,0 +1,50 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from feeds.dates import parse_date
+
+EXPECTED = datetime(2023, 10, 2, 10, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "Mon, 02 Oct 2023 10:00:00 +0000",
+        "Mon, 02 Oct 2023 10:00:00 GMT",
+        "Mon, 02 Oct 2023 12:00:00 +0200",
+        "02 Oct 2023 10:00:00 Z",
+        "2023-10-02T10:00:00Z",
+        "2023-10-02T10:00:00.000+00:00",
+        "2023-10-02T06:00:00-04:00",
+        "October 2nd, 2023 10:00 AM UTC",
+    ],
+)
+def test_parse_date(value):
+    assert parse_date(value) == EXPECTED
+
+
+def test_struct_time_used():
+    """The date parsed by feedparser is used if it is available"""
+    parsed = time.strptime("2023-10-02 10:00:00", "%Y-%m-%d %H:%M:%S")
+    assert parse_date("not a date", parsed) == EXPECTED
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "Mon, 02 Oct 2023 10:00:00 -0000",
+        "2023-10-02T10:00:00",
+        "2023-10-02 10:00",
+    ],
+)
+def test_naive_dates_are_utc(value):
+    date = parse_date(value)
+    assert date == EXPECTED
+    assert date.utcoffset() == timedelta(0)
+
+
+@pytest.mark.parametrize("value", [None, "", "  ", "not a date"])
+def test_invalid_date(value):
+    assert parse_date(value) is None
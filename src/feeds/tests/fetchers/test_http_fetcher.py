@@ -0,0 +1,166 @@
+import datetime as dt
+import gzip
+import time
+import zlib
+
+import pytest
+
+from feeds import loader
+from feeds.fetchers import FetchError, HttpFetcher
+from feeds.models import Article
+from feeds.tests.factories import FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+document = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0">
+  <channel>
+    <title>Feed</title>
+    <item>
+      <title>Article title</title>
+      <link>https://www.example.com/entry/</link>
+      <guid>Article:Identifier</guid>
+      <pubDate>Mon, 02 Oct 2023 10:00:00 +0000</pubDate>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+def test_fetch(feed_server):
+    """The status, headers and content are returned"""
+    feed_server.routes["/feed/"] = (200, {"ETag": '"abc"'}, document)
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert response.status == 200
+    assert response.headers["etag"] == '"abc"'
+    assert response.content == document
+
+
+def test_conditional_headers(feed_server):
+    """The ETag and Last-Modified values are sent with the request"""
+    feed_server.routes["/feed/"] = (304, {}, b"")
+    modified = dt.datetime(2023, 10, 2, 10, 0, tzinfo=dt.timezone.utc)
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", '"abc"', modified)
+    headers = feed_server.requests[0]
+    assert response.status == 304
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == "Mon, 02 Oct 2023 10:00:00 GMT"
+
+
+def test_user_agent(feed_server, settings):
+    """The User-Agent header identifies who is fetching the feed"""
+    settings.FEEDS_USER_AGENT = "Test Agent"
+    feed_server.routes["/feed/"] = (200, {}, document)
+    HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert feed_server.requests[0]["User-Agent"] == "Test Agent"
+
+
+@pytest.mark.parametrize(
+    "encoding,compress", [("gzip", gzip.compress), ("deflate", zlib.compress)]
+)
+def test_compressed_content(feed_server, encoding, compress):
+    """Compressed documents are decoded"""
+    headers = {"Content-Encoding": encoding}
+    feed_server.routes["/feed/"] = (200, headers, compress(document))
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert encoding in feed_server.requests[0]["Accept-Encoding"]
+    assert response.content == document
+
+
+def test_redirect_followed(feed_server):
+    """Redirects are followed and the final URL is returned"""
+    location = {"Location": feed_server.url + "/new/"}
+    feed_server.routes["/feed/"] = (302, location, b"")
+    feed_server.routes["/new/"] = (200, {}, document)
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert response.content == document
+    assert response.href == feed_server.url + "/new/"
+
+
+def test_maximum_size(feed_server, settings):
+    """Documents which are too large are discarded"""
+    settings.FEEDS_FETCH_MAX_SIZE = 100
+    feed_server.routes["/feed/"] = (200, {}, document)
+    with pytest.raises(FetchError):
+        HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+
+
+def test_slow_server(feed_server, settings):
+    """Documents which are not read in time are discarded"""
+
+    def trickle():
+        for _ in range(100):
+            time.sleep(0.1)
+            yield b" "
+
+    settings.FEEDS_FETCH_READ_TIMEOUT = 0.5
+    feed_server.routes["/feed/"] = (200, {"Content-Length": "100"}, trickle())
+    start = time.monotonic()
+    with pytest.raises(FetchError, match="not read in time"):
+        HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert time.monotonic() - start < 2
+
+
+def test_connection_error():
+    """Errors connecting to the server are reported"""
+    with pytest.raises(FetchError):
+        HttpFetcher().fetch("http://127.0.0.1:1/feed/", None, None)
+
+
+def test_feed_loaded(feed_server):
+    """The fetched document is parsed and the entries saved"""
+    headers = {"Content-Type": "application/rss+xml"}
+    feed_server.routes["/feed/"] = (200, headers, document)
+    feed = FeedFactory.create(url=feed_server.url + "/feed/")
+    assert loader.load_feed(feed) is True
+    assert feed.status == 200
+    assert Article.objects.get().identifier == "Article:Identifier"
+
+
+@pytest.mark.parametrize("status", [301, 308])
+def test_permanent_redirect(feed_server, status):
+    """The new location is returned if the feed moved permanently"""
+    feed_server.routes["/feed/"] = (status, {"Location": "/new/"}, b"")
+    feed_server.routes["/new/"] = (200, {}, document)
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert response.location == feed_server.url + "/new/"
+
+
+@pytest.mark.parametrize("status", [302, 307])
+def test_temporary_redirect(feed_server, status):
+    """The location is not returned if the feed moved temporarily"""
+    feed_server.routes["/feed/"] = (status, {"Location": "/new/"}, b"")
+    feed_server.routes["/new/"] = (200, {}, document)
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert response.location == ""
+
+
+def test_redirect_chain(feed_server):
+    """Only the permanent redirects at the start of the chain are used"""
+    feed_server.routes["/feed/"] = (301, {"Location": "/moved/"}, b"")
+    feed_server.routes["/moved/"] = (302, {"Location": "/new/"}, b"")
+    feed_server.routes["/new/"] = (200, {}, document)
+    response = HttpFetcher().fetch(feed_server.url + "/feed/", None, None)
+    assert response.location == feed_server.url + "/moved/"
+
+
+def test_feed_moved(feed_server):
+    """The URL of a feed is updated when it moves permanently"""
+    headers = {"Content-Type": "application/rss+xml"}
+    feed_server.routes["/feed/"] = (301, {"Location": "/new/"}, b"")
+    feed_server.routes["/new/"] = (200, headers, document)
+    feed = FeedFactory.create(url=feed_server.url + "/feed/")
+    loader.load_feed(feed)
+    feed.refresh_from_db()
+    assert feed.url == feed_server.url + "/new/"
+    assert feed.previous_urls == [feed_server.url + "/feed/"]
+
+
+def test_failed_feed_not_moved(feed_server):
+    """The URL is not updated if the feed was not fetched from the new one"""
+    feed_server.routes["/feed/"] = (301, {"Location": "/new/"}, b"")
+    feed = FeedFactory.create(url=feed_server.url + "/feed/")
+    loader.load_feed(feed)
+    feed.refresh_from_db()
+    assert feed.url == feed_server.url + "/feed/"
+    assert feed.previous_urls == []
@@ -0,0 +1,180 @@
+import datetime as dt
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+import pytest
+
+from feeds import loader
+from feeds.loader import Entry
+from feeds.models import Article
+from feeds.tests.factories import ArticleFactory, CategoryFactory, FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def make_entries(count):
+    date = timezone.now().replace(microsecond=0) - dt.timedelta(days=1)
+    return [
+        Entry(
+            identifier="entry:%d" % idx,
+            title="Title %d" % idx,
+            summary="Summary %d" % idx,
+            url="https://www.example.com/entry/%d/" % idx,
+            published=date,
+            authors=[],
+            tags=[],
+        )
+        for idx in range(count)
+    ]
+
+
+def test_articles_created():
+    """An Article is created for each entry"""
+    feed = FeedFactory.create()
+    loader.create_or_update_articles(feed, make_entries(3))
+    assert Article.objects.filter(feed=feed).count() == 3
+
+
+def test_articles_updated(django_assert_num_queries):
+    """Existing Articles are updated with a fixed number of queries"""
+    feed = FeedFactory.create()
+    entries = make_entries(10)
+    for entry in entries:
+        ArticleFactory.create(feed=feed, identifier=entry.identifier)
+
+    # One query to fetch the Articles, one to update them.
+    with django_assert_num_queries(2):
+        loader.create_or_update_articles(feed, entries)
+
+    actual = sorted(Article.objects.values_list("title", flat=True))
+    expected = sorted(entry.title for entry in entries)
+    assert actual == expected
+
+
+def test_repeated_entry():
+    """Only one Article is created if an entry is repeated in a feed"""
+    feed = FeedFactory.create()
+    first, second = make_entries(2)
+    second = second._replace(identifier=first.identifier)
+    loader.create_or_update_articles(feed, [first, second])
+    assert Article.objects.get().title == second.title
+
+
+def test_category_count_updated():
+    """The usage count for each Category is updated"""
+    category = CategoryFactory.create()
+    feed = FeedFactory.create(categories=[category])
+    category.refresh_from_db()
+    count = category.count
+    loader.create_or_update_articles(feed, make_entries(3))
+    category.refresh_from_db()
+    assert category.count == count + 3
+    assert Article.objects.filter(categories=category).count() == 3
+
+
+def test_unchanged_articles_skipped(django_assert_num_queries):
+    """Articles are not saved if the entry has not changed"""
+    feed = FeedFactory.create()
+    entries = make_entries(3)
+    loader.create_or_update_articles(feed, entries)
+    modified = list(Article.objects.values_list("modified", flat=True))
+
+    # One query to fetch the Articles and nothing else.
+    with django_assert_num_queries(1):
+        counts = loader.create_or_update_articles(feed, entries)
+
+    assert counts == {"added": 0, "updated": 0, "unchanged": 3}
+    assert list(Article.objects.values_list("modified", flat=True)) == modified
+
+
+def test_changed_articles_updated():
+    """Articles are saved if the entry changed"""
+    feed = FeedFactory.create()
+    entries = make_entries(3)
+    loader.create_or_update_articles(feed, entries)
+    entries[0] = entries[0]._replace(title="Updated title")
+    entries.append(make_entries(4)[-1])
+
+    counts = loader.create_or_update_articles(feed, entries)
+
+    assert counts == {"added": 1, "updated": 1, "unchanged": 2}
+    assert Article.objects.filter(title="Updated title").exists()
+
+
+def test_whitespace_ignored():
+    """Reformatting an entry does not count as a change"""
+    feed = FeedFactory.create()
+    entries = make_entries(1)
+    loader.create_or_update_articles(feed, entries)
+    entries[0] = entries[0]._replace(title=" %s\n" % entries[0].title)
+    counts = loader.create_or_update_articles(feed, entries)
+    assert counts["unchanged"] == 1
+
+
+def test_long_values_shortened():
+    """Titles and names which are too long are shortened"""
+    feed = FeedFactory.create()
+    entry = make_entries(1)[0]
+    entry = entry._replace(title="x" * 2000, authors=["y" * 200], tags=["z" * 200])
+    loader.create_or_update_articles(feed, [entry])
+    article = Article.objects.get()
+    assert len(article.title) == 1000
+    assert len(article.authors.get().name) == 100
+    assert len(article.tags.get().name) == 100
+
+
+def test_long_url_skipped():
+    """Entries with a URL which is too long are skipped"""
+    feed = FeedFactory.create()
+    first, second = make_entries(2)
+    second = second._replace(url=second.url + "x" * 2000)
+    counts = loader.create_or_update_articles(feed, [first, second])
+    assert counts["added"] == 1
+
+
+def test_nul_characters_removed():
+    """NUL characters are removed since PostgreSQL does not allow them"""
+    feed = FeedFactory.create()
+    entry = make_entries(1)[0]
+    entry = entry._replace(title="Title\x00", summary="Summary\x00")
+    loader.create_or_update_articles(feed, [entry])
+    assert Article.objects.filter(title="Title", summary="Summary").exists()
+
+
+def test_articles_saved_separately(monkeypatch):
+    """If saving the Articles in bulk fails, each one is saved in turn"""
+    create_or_update_articles = loader.create_or_update_articles
+
+    def mock_save(feed, entries):
+        counts = create_or_update_articles(feed, entries)
+        if any(entry.title == "Title 1" for entry in entries):
+            raise DatabaseError()
+        return counts
+
+    monkeypatch.setattr(loader, "create_or_update_articles", mock_save)
+    feed = FeedFactory.create()
+    counts = loader.save_articles(feed, make_entries(3))
+
+    assert counts == {"added": 2, "updated": 0, "unchanged": 0}
+    actual = sorted(Article.objects.values_list("title", flat=True))
+    assert actual == ["Title 0", "Title 2"]
+
+
+def test_entry_in_several_feeds():
+    """Only one Article is created for an entry which appears in two feeds"""
+    first, second = FeedFactory.create_batch(2)
+    entries = make_entries(1)
+    loader.create_or_update_articles(first, entries)
+    counts = loader.create_or_update_articles(second, entries)
+    assert counts == {"added": 0, "updated": 0, "unchanged": 1}
+    assert Article.objects.count() == 1
+
+
+def test_article_without_feed_matched():
+    """Articles which are not linked to a feed are matched"""
+    feed = FeedFactory.create()
+    entries = make_entries(1)
+    ArticleFactory.create(identifier=entries[0].identifier, feed=None)
+    loader.create_or_update_articles(feed, entries)
+    assert Article.objects.count() == 1
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+
+import pytest
+
+from feeds import loader
+from feeds.caches import VERSION_KEY
+from feeds.models import Author
+from feeds.tests.factories import AliasFactory, AuthorFactory, FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def author_cache(settings, use_local_cache):
+    settings.FEEDS_AUTHOR_CACHE_TIMEOUT = 60
+
+
+def test_alias_used(django_assert_num_queries):
+    """The Aliases for the feed are loaded with one query"""
+    alias = AliasFactory.create()
+    with django_assert_num_queries(1):
+        authors = loader.authors_for_names(alias.feed, [alias.name])
+    assert authors == {alias.name: alias.author.pk}
+
+
+def test_name_looked_up_once(django_assert_num_queries):
+    """Each name is only looked up once"""
+    feed = FeedFactory.create()
+    author = AuthorFactory.create(name="Joe Bloggs")
+    with django_assert_num_queries(2):
+        authors = loader.authors_for_names(feed, [author.name] * 3)
+    assert authors == {author.name: author.pk}
+
+
+def test_author_created():
+    """An Author is added for names which are not found"""
+    feed = FeedFactory.create()
+    authors = loader.authors_for_names(feed, ["Joe Bloggs"])
+    assert Author.objects.get(pk=authors["Joe Bloggs"]).name == "Joe Bloggs"
+
+
+def test_authors_cached(author_cache, django_assert_num_queries):
+    """Names found the last time the feed was loaded are not looked up"""
+    feed = FeedFactory.create()
+    expected = loader.authors_for_names(feed, ["Joe Bloggs"])
+
+    # One query for the Aliases, one to check the Author still exists.
+    with django_assert_num_queries(2):
+        assert loader.authors_for_names(feed, ["Joe Bloggs"]) == expected
+
+
+def test_alias_invalidates_cache(author_cache):
+    """Adding an Alias clears the cache"""
+    feed = FeedFactory.create()
+    loader.authors_for_names(feed, ["Joe Bloggs"])
+    alias = AliasFactory.create(feed=feed, name="Joe Bloggs")
+    authors = loader.authors_for_names(feed, ["Joe Bloggs"])
+    assert authors == {"Joe Bloggs": alias.author.pk}
+
+
+def test_merged_author_invalidates_cache(author_cache):
+    """Deleting an Author clears the cache"""
+    feed = FeedFactory.create()
+    first = loader.authors_for_names(feed, ["Joe Bloggs"])
+    Author.objects.filter(pk=first["Joe Bloggs"]).delete()
+    second = loader.authors_for_names(feed, ["Joe Bloggs"])
+    assert second["Joe Bloggs"] != first["Joe Bloggs"]
+
+
+def test_deleted_author_not_used(author_cache):
+    """Cached Authors deleted by another process are not used"""
+    feed = FeedFactory.create()
+    first = loader.authors_for_names(feed, ["Joe Bloggs"])
+    # Restore the version to simulate the Author being deleted by a
+    # process which does not share the cache.
+    version = cache.get(VERSION_KEY)
+    Author.objects.filter(pk=first["Joe Bloggs"]).delete()
+    cache.set(VERSION_KEY, version)
+    second = loader.authors_for_names(feed, ["Joe Bloggs"])
+    assert Author.objects.filter(pk=second["Joe Bloggs"]).exists()
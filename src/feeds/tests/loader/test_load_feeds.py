@@ -0,0 +1,198 @@
+import threading
+import time
+
+from django.utils import timezone
+
+import pytest
+
+from feeds import loader
+from feeds.loader import HostScheduler
+from feeds.models import Article, Feed
+from feeds.tests.factories import FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def feed_template():
+    return """<?xml version="1.0" encoding="utf-8"?>
+    <feed xmlns="http://www.w3.org/2005/Atom"
+          xml:base="http://example.org/"
+          xml:lang="en">
+      <link rel="self" type="application/atom+xml"
+            href="http://www.example.org/atom10.xml"/>
+      <entry>
+        <title>Article title</title>
+        <link>https://www.example.com/%(identifier)s/</link>
+        <id>%(identifier)s</id>
+        <updated>Mon, 02 Oct 2023 10:00:00 +0000</updated>
+        <published>Mon, 02 Oct 2023 10:00:00 +0000</published>
+      </entry>
+    </feed>
+    """
+
+
+def test_feeds_loaded(monkeypatch, feed_template):
+    """All the scheduled feeds are fetched and their entries saved"""
+
+    def mock_return(feed):
+        return feed_template % {"identifier": feed.pk}
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    feeds = FeedFactory.create_batch(
+        5, enabled=True, failures=1, next_run=timezone.now()
+    )
+    loader.load_feeds()
+
+    assert Article.objects.count() == len(feeds)
+    assert all(feed.failures == 0 for feed in Feed.objects.all())
+
+
+def test_fetch_error(monkeypatch, feed_template):
+    """A request error for one feed does not stop the other feeds loading"""
+    failing = FeedFactory.create(enabled=True, name="failing", next_run=timezone.now())
+    FeedFactory.create(enabled=True, name="working", next_run=timezone.now())
+
+    def mock_return(feed):
+        if feed.pk == failing.pk:
+            # Nothing listens on port 1 so the connection is refused.
+            return "http://127.0.0.1:1/feed/"
+        return feed_template % {"identifier": feed.name}
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    loader.load_feeds()
+
+    failing.refresh_from_db()
+
+    assert failing.status == 400
+    assert failing.failures == 1
+    assert Article.objects.get().feed.name == "working"
+
+
+def test_unexpected_error(monkeypatch, feed_template):
+    """An unexpected error is recorded and the feed rescheduled"""
+    failing = FeedFactory.create(enabled=True, name="failing", next_run=timezone.now())
+    FeedFactory.create(enabled=True, name="working", next_run=timezone.now())
+    parse_feed = loader.parse_feed
+
+    def mock_parse_feed(response):
+        if "failing" in response.content.decode():
+            raise ValueError("Unexpected")
+        return parse_feed(response)
+
+    def mock_return(feed):
+        return feed_template % {"identifier": feed.name}
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    monkeypatch.setattr(loader, "parse_feed", mock_parse_feed)
+    loader.load_feeds()
+
+    failing.refresh_from_db()
+
+    assert failing.status == 400
+    assert failing.failures == 1
+    assert failing.next_run > timezone.now()
+    assert Article.objects.get().feed.name == "working"
+
+
+def test_host_connections_limited(monkeypatch, feed_template, settings):
+    """The number of concurrent requests to a host is capped"""
+    settings.FEEDS_LOAD_HOST_CONNECTIONS = 1
+    settings.FEEDS_LOAD_HOST_RATE = 0
+    FeedFactory.create_batch(
+        3,
+        enabled=True,
+        url="https://www.example.com/feed/",
+        next_run=timezone.now(),
+    )
+    lock = threading.Lock()
+    active = []
+    highest = 0
+
+    def mock_return(feed):
+        nonlocal highest
+        with lock:
+            active.append(feed)
+            highest = max(highest, len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(feed)
+        return feed_template % {"identifier": feed.pk}
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    loader.load_feeds()
+
+    assert highest == 1
+    assert Article.objects.count() == 3
+
+
+def test_next_run_updated(monkeypatch, feed_template):
+    """The time the feed is next loaded is updated"""
+
+    def mock_return(feed):
+        return feed_template % {"identifier": feed.pk}
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    feed = FeedFactory.create(enabled=True, next_run=timezone.now())
+    loader.load_feeds()
+    feed.refresh_from_db()
+
+    assert feed.next_run > timezone.now()
+    assert not Feed.objects.scheduled_for(timezone.now()).exists()
+
+
+def test_host_rate_limited(monkeypatch, feed_template, settings):
+    """The number of requests per second to a host is capped"""
+    settings.FEEDS_LOAD_HOST_RATE = 10
+    FeedFactory.create_batch(
+        3,
+        enabled=True,
+        url="https://www.example.com/feed/",
+        next_run=timezone.now(),
+    )
+    started = []
+
+    def mock_return(feed):
+        started.append(time.monotonic())
+        return feed_template % {"identifier": feed.pk}
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    loader.load_feeds()
+
+    started.sort()
+    assert all(b - a >= 0.09 for a, b in zip(started, started[1:]))
+    assert Article.objects.count() == 3
+
+
+def test_scheduler_hosts_in_turn():
+    """Feeds are taken from each host in turn"""
+    feeds = [
+        Feed(name="a1", url="https://a.com/1/"),
+        Feed(name="a2", url="https://a.com/2/"),
+        Feed(name="b1", url="https://b.com/1/"),
+    ]
+    scheduler = HostScheduler(feeds, connections=2, rate=0, window=0)
+    assert [feed.name for feed in scheduler.ready(0, 2)] == ["a1", "b1"]
+    assert [feed.name for feed in scheduler.ready(0, 2)] == ["a2"]
+    assert not scheduler.pending()
+
+
+def test_scheduler_connections_limited():
+    """No more feeds are taken from a host until a request finishes"""
+    feeds = [Feed(url="https://a.com/1/"), Feed(url="https://a.com/2/")]
+    scheduler = HostScheduler(feeds, connections=1, rate=0, window=0)
+    first = scheduler.ready(0, 10)
+    assert scheduler.ready(0, 10) == []
+    assert scheduler.delay(0) is None
+    scheduler.done(first[0])
+    assert len(scheduler.ready(0, 10)) == 1
+
+
+def test_scheduler_window_spread():
+    """The requests to a host are spread across the window"""
+    feeds = [Feed(url="https://a.com/%d/" % n) for n in range(4)]
+    scheduler = HostScheduler(feeds, connections=4, rate=0, window=60)
+    assert len(scheduler.ready(0, 10)) == 1
+    assert scheduler.delay(0) == 15
+    assert scheduler.ready(10, 10) == []
+    assert len(scheduler.ready(15, 10)) == 1
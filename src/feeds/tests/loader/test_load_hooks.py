@@ -3,8 +3,9 @@ from django.utils import timezone
 
 import pytest
 
-from feeds.models import Article
 from feeds import loader
+from feeds.fetchers import Response
+from feeds.models import Article
 from feeds.tests.factories import FeedFactory
 
 pytestmark = pytest.mark.django_db
@@ -115,3 +116,106 @@ def test_tags_hook(monkeypatch, feed_template, feed_context, settings):
     expected = filter_tags(feed_context["tags"])
     actual = [tag.name for tag in article.tags.all()]
     assert actual == expected
+
+
+def filter_entry(entry):
+    if entry.title.endswith("."):
+        return entry._replace(title=entry.title[:-1])
+    return None
+
+
+def skip_entry(entry):
+    return None
+
+
+def test_entry_hook(monkeypatch, feed_template, feed_context, settings):
+    settings.FEEDS_FILTER_ENTRY = "feeds.tests.loader.test_load_hooks.filter_entry"
+
+    def mock_return(feed):
+        template = Template(feed_template)
+        context = Context(feed_context)
+        return template.render(context)
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    feed = FeedFactory.create(enabled=True)
+    loader.load_feed(feed)
+    article = Article.objects.first()
+
+    assert article.title == feed_context["title"][:-1]
+
+
+def test_entry_hook_skips(monkeypatch, feed_template, feed_context, settings):
+    settings.FEEDS_FILTER_ENTRY = "feeds.tests.loader.test_load_hooks.skip_entry"
+
+    def mock_return(feed):
+        template = Template(feed_template)
+        context = Context(feed_context)
+        return template.render(context)
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    feed = FeedFactory.create(enabled=True)
+    loader.load_feed(feed)
+
+    assert not Article.objects.exists()
+
+
+@loader.batch
+def filter_titles(titles):
+    return [title.upper() for title in titles]
+
+
+@loader.batch
+def skip_entries(entries):
+    return [entry for entry in entries if "First" not in entry.tags]
+
+
+def test_batch_hook(monkeypatch, feed_template, feed_context, settings):
+    settings.FEEDS_FILTER_TITLE = "feeds.tests.loader.test_load_hooks.filter_titles"
+
+    def mock_return(feed):
+        template = Template(feed_template)
+        context = Context(feed_context)
+        return template.render(context)
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    feed = FeedFactory.create(enabled=True)
+    loader.load_feed(feed)
+    article = Article.objects.first()
+
+    assert article.title == feed_context["title"].upper()
+
+
+def test_batch_entry_hook(monkeypatch, feed_template, feed_context, settings):
+    settings.FEEDS_FILTER_ENTRY = "feeds.tests.loader.test_load_hooks.skip_entries"
+
+    def mock_return(feed):
+        template = Template(feed_template)
+        context = Context(feed_context)
+        return template.render(context)
+
+    monkeypatch.setattr(loader, "get_source", mock_return)
+    feed = FeedFactory.create(enabled=True)
+    loader.load_feed(feed)
+
+    assert not Article.objects.exists()
+
+
+def test_batch_hook_not_run_when_parsed(feed_template, feed_context, settings):
+    settings.FEEDS_FILTER_TITLE = "feeds.tests.loader.test_load_hooks.filter_titles"
+    content = Template(feed_template).render(Context(feed_context)).encode()
+    parsed = loader.parse_feed(Response(url="", status=200, content=content))
+    assert parsed.entries[0].title == feed_context["title"]
+
+
+def test_hook_imported_once(monkeypatch, settings):
+    settings.FEEDS_FILTER_TITLE = "feeds.tests.loader.test_load_hooks.filter_title"
+    assert loader.filter_title("Title") == "title"
+    monkeypatch.setattr(loader, "import_string", None)
+    assert loader.filter_title("Title") == "title"
+
+
+def test_hook_cleared(settings):
+    settings.FEEDS_FILTER_TITLE = "feeds.tests.loader.test_load_hooks.filter_title"
+    assert loader.filter_title("Title") == "title"
+    settings.FEEDS_FILTER_TITLE = None
+    assert loader.filter_title("Title") == "Title"
@@ -0,0 +1,162 @@
+import datetime as dt
+import pickle
+
+from django.utils import timezone
+
+import pytest
+
+from feeds import loader, parsers
+from feeds.loader import ParsedFeed, Response
+from feeds.models import Article
+from feeds.tests.factories import FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def feed_document():
+    return b"""<?xml version="1.0" encoding="utf-8"?>
+    <feed xmlns="http://www.w3.org/2005/Atom"
+          xml:base="http://example.org/"
+          xml:lang="en">
+      <link rel="self" type="application/atom+xml"
+            href="http://www.example.org/atom10.xml"/>
+      <entry>
+        <title>Article title</title>
+        <link>https://www.example.com/entry/</link>
+        <id>Article:Identifier</id>
+        <updated>Mon, 02 Oct 2023 10:00:00 +0000</updated>
+        <published>Mon, 02 Oct 2023 10:00:00 +0000</published>
+        <author><name>Article Author</name></author>
+        <category term="Tag" />
+      </entry>
+    </feed>
+    """
+
+
+def test_fetch_injected_source(monkeypatch, feed_document):
+    """A string returned by get_source() is used as the content"""
+    monkeypatch.setattr(loader, "get_source", lambda feed: feed_document.decode())
+    response = loader.fetch_feed(FeedFactory.create())
+    assert response.status is None
+    assert response.content == feed_document
+
+
+def test_parse_entries(feed_document):
+    """The entries are extracted from the document"""
+    parsed = loader.parse_feed(Response(url="", status=200, content=feed_document))
+    entry = parsed.entries[0]
+    assert parsed.error is None
+    assert entry.identifier == "Article:Identifier"
+    assert entry.title == "Article title"
+    assert entry.url == "https://www.example.com/entry/"
+    assert entry.authors == ["Article Author"]
+    assert entry.tags == ["Tag"]
+
+
+def test_parse_drops_content(feed_document):
+    """The content is not passed on once the document is parsed"""
+    parsed = loader.parse_feed(Response(url="", status=200, content=feed_document))
+    assert parsed.response.content == b""
+
+
+def test_parse_results_pickled(feed_document):
+    """The results can be passed between processes"""
+    parsed = loader.parse_feed(Response(url="", status=200, content=feed_document))
+    assert pickle.loads(pickle.dumps(parsed)) == parsed
+
+
+def test_unchanged_not_parsed(feed_document):
+    """The document is not parsed if the feed has not changed"""
+    parsed = loader.parse_feed(Response(url="", status=304, content=feed_document))
+    assert parsed.entries == []
+
+
+def test_parse_error():
+    """Parsing errors are reported"""
+    content = b"<rss><channel><item><title>Title</item></channel></rss>"
+    parsed = loader.parse_feed(Response(url="", status=200, content=content))
+    assert parsed.error
+
+
+def test_persist_parse_error():
+    """A feed that cannot be parsed is recorded as a failure"""
+    feed = FeedFactory.create(failures=0)
+    response = Response(url=feed.url, status=200)
+    loader.persist_feed(feed, ParsedFeed(response, error="Not well-formed"))
+    feed.refresh_from_db()
+    assert feed.status == 200
+    assert feed.failures == 1
+
+
+@pytest.mark.freeze_time
+def test_persist_retry_after():
+    """The Retry-After header is used to set when the feed is next loaded"""
+    feed = FeedFactory.create(failures=0)
+    headers = {"retry-after": "86400"}
+    response = Response(url=feed.url, status=429, headers=headers)
+    loader.persist_feed(feed, ParsedFeed(response))
+    feed.refresh_from_db()
+    assert feed.failures == 1
+    assert feed.next_run == timezone.now() + dt.timedelta(days=1)
+
+
+def test_retry_after_date():
+    """The Retry-After header can be a date"""
+    now = timezone.now().replace(microsecond=0)
+    value = (now + dt.timedelta(hours=1)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    response = Response(url="", status=503, headers={"retry-after": value})
+    assert loader.get_retry_after(response, now) == dt.timedelta(hours=1)
+
+
+def test_persist_entries(feed_document):
+    """The entries are saved as Articles"""
+    feed = FeedFactory.create()
+    parsed = loader.parse_feed(Response(url="", status=200, content=feed_document))
+    assert loader.persist_feed(feed, parsed) is True
+    assert Article.objects.get().identifier == "Article:Identifier"
+
+
+def test_parse_in_processes(monkeypatch, feed_document, settings):
+    """Feeds can be parsed in a pool of processes"""
+    settings.FEEDS_LOAD_PARSERS = 1
+    monkeypatch.setattr(loader, "get_source", lambda feed: feed_document.decode())
+    FeedFactory.create(enabled=True, next_run=timezone.now())
+    loader.load_feeds()
+    assert Article.objects.get().identifier == "Article:Identifier"
+
+
+def test_unchanged_content_skipped(monkeypatch, feed_document):
+    """A feed is not parsed if the content is the same as the last time"""
+    monkeypatch.setattr(loader, "get_source", lambda feed: feed_document.decode())
+    feed = FeedFactory.create()
+    assert loader.load_feed(feed) is True
+
+    def mock_parse(*args, **kwargs):
+        raise AssertionError("Feed was parsed")
+
+    monkeypatch.setattr(parsers.feedparser, "parse", mock_parse)
+    feed.failures = 2
+    assert loader.load_feed(feed) is False
+    feed.refresh_from_db()
+    assert feed.failures == 0
+
+
+def test_changed_content_parsed(monkeypatch, feed_document):
+    """A feed is parsed if the content changed since the last time"""
+    monkeypatch.setattr(loader, "get_source", lambda feed: feed_document.decode())
+    feed = FeedFactory.create()
+    loader.load_feed(feed)
+    changed = feed_document.replace(b"Article title", b"Updated title")
+    monkeypatch.setattr(loader, "get_source", lambda feed: changed.decode())
+    assert loader.load_feed(feed) is True
+    assert Article.objects.get().title == "Updated title"
+
+
+def test_failed_content_not_recorded():
+    """The digest is only saved when a feed is loaded successfully"""
+    feed = FeedFactory.create(content_digest="digest")
+    response = Response(url=feed.url, status=200, digest="changed")
+    loader.persist_feed(feed, ParsedFeed(response, error="Not well-formed"))
+    feed.refresh_from_db()
+    assert feed.content_digest == "digest"
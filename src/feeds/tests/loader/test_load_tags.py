@@ -0,0 +1,46 @@
+import pytest
+
+from feeds import loader
+from feeds.models import Tag
+from feeds.tests.factories import TagFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_tag_matched_on_slug(django_assert_num_queries):
+    """Existing Tags are found, ignoring case, with one query"""
+    tag = TagFactory.create(name="Django", slug="django")
+    with django_assert_num_queries(1):
+        tags = loader.tags_for_names(["Django", "django"])
+    assert tags == {"Django": tag.pk, "django": tag.pk}
+
+
+def test_tags_created(django_assert_num_queries):
+    """The missing Tags are added together"""
+    with django_assert_num_queries(3):
+        tags = loader.tags_for_names(["Django", "Python", "django"])
+    assert Tag.objects.count() == 2
+    assert tags["Django"] == tags["django"]
+    assert Tag.objects.get(pk=tags["Python"]).slug == "python"
+
+
+def test_conflicts_ignored(monkeypatch):
+    """A Tag added by another loader is used"""
+    tag = TagFactory.create(name="Django", slug="django")
+    filter = Tag.objects.filter
+
+    def missing(**kwargs):
+        # The first lookup does not find the Tag, as if it was added
+        # by another loader after the query was run.
+        monkeypatch.setattr(Tag.objects, "filter", filter)
+        return Tag.objects.none()
+
+    monkeypatch.setattr(Tag.objects, "filter", missing)
+    assert loader.tags_for_names(["Django"]) == {"Django": tag.pk}
+    assert Tag.objects.count() == 1
+
+
+def test_empty_slug_skipped():
+    """Names without a slug are ignored"""
+    assert loader.tags_for_names(["!!!"]) == {}
+    assert not Tag.objects.exists()
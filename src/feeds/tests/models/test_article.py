@@ -5,6 +5,7 @@ from django.utils import timezone
 import pytest
 
 from feeds.models import Article
+from feeds.models.article import identifier_digest
 from feeds.tests.factories import ArticleFactory
 
 pytestmark = pytest.mark.django_db
@@ -27,3 +28,22 @@ def test_for_date():
     queryset = Article.objects.for_date(today)
     assert queryset.count() == 1
     assert queryset.first().title == "second"
+
+
+def test_identifier_digest_set():
+    article = ArticleFactory.create(identifier="Article:Identifier")
+    assert article.identifier_digest == identifier_digest("Article:Identifier")
+
+
+def test_with_identifier():
+    article = ArticleFactory.create(identifier="first")
+    ArticleFactory.create(identifier="second")
+    queryset = Article.objects.with_identifier("first")
+    assert list(queryset) == [article]
+
+
+def test_with_identifier_for_feed():
+    article = ArticleFactory.create(identifier="first")
+    ArticleFactory.create(identifier="first")
+    queryset = Article.objects.with_identifier("first", feed=article.feed)
+    assert list(queryset) == [article]
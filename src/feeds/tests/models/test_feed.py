@@ -1,10 +1,12 @@
+import datetime as dt
+
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 import pytest
 
 from feeds.models import Feed
-from feeds.tests.factories import FeedFactory
+from feeds.tests.factories import ArticleFactory, FeedFactory
 
 pytestmark = pytest.mark.django_db
 
@@ -17,23 +19,49 @@ def test_schedule_invalid():
 def test_schedule_minutes_valid():
     FeedFactory(schedule="0 10 * * *").full_clean()
     FeedFactory(schedule="* 10 * * *").full_clean()
+    FeedFactory(schedule="15 10 * * *").full_clean()
 
 
-def test_schedule_minutes_invalid():
-    with pytest.raises(ValidationError):
-        FeedFactory(schedule="15 10 * * *").full_clean()
+@pytest.mark.freeze_time
+def test_next_run_set(freezer):
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
+    feed = FeedFactory.create(schedule="0 10 * * *")
+    assert feed.next_run == timezone.now().replace(
+        minute=0, hour=10, second=0, microsecond=0
+    )
+
+
+@pytest.mark.freeze_time
+def test_next_run_updated(freezer):
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
+    feed = FeedFactory.create(schedule="0 10 * * *")
+    feed.schedule = "15 9 * * *"
+    feed.save()
+    expected = timezone.now().replace(minute=15, hour=9, second=0, microsecond=0)
+    assert feed.next_run == expected + dt.timedelta(days=1)
 
 
 @pytest.mark.freeze_time
 def test_feed_scheduled(freezer):
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
     feed = FeedFactory.create(enabled=True, schedule="0 10 * * *")
     freezer.move_to(timezone.now().replace(minute=0, hour=10))
     feeds = Feed.objects.scheduled_for(timezone.now())
     assert feed.pk in [feed.pk for feed in feeds]
 
 
+@pytest.mark.freeze_time
+def test_overdue_feed_scheduled(freezer):
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
+    feed = FeedFactory.create(enabled=True, schedule="0 10 * * *")
+    freezer.move_to(timezone.now().replace(minute=20, hour=10))
+    feeds = Feed.objects.scheduled_for(timezone.now())
+    assert feed.pk in [feed.pk for feed in feeds]
+
+
 @pytest.mark.freeze_time
 def test_unscheduled_feed_skipped(monkeypatch, freezer):
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
     feed = FeedFactory.create(enabled=True, schedule="0 11 * * *")
     freezer.move_to(timezone.now().replace(minute=0, hour=10))
     feeds = Feed.objects.scheduled_for(timezone.now())
@@ -42,8 +70,141 @@ def test_unscheduled_feed_skipped(monkeypatch, freezer):
 
 @pytest.mark.freeze_time
 def test_default_schedule_used(monkeypatch, freezer, settings):
-    feed = FeedFactory.create(enabled=True, schedule="")
     settings.FEEDS_LOAD_SCHEDULE = "0 10 * * *"
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
+    feed = FeedFactory.create(enabled=True, schedule="")
     freezer.move_to(timezone.now().replace(minute=0, hour=10))
     feeds = Feed.objects.scheduled_for(timezone.now())
     assert feed.pk in [feed.pk for feed in feeds]
+
+
+def test_query_count(django_assert_num_queries):
+    FeedFactory.create_batch(5, enabled=True, next_run=timezone.now())
+    with django_assert_num_queries(1):
+        assert len(Feed.objects.scheduled_for(timezone.now())) == 5
+
+
+def test_deferred_schedule(django_assert_num_queries):
+    """Loading Feeds without the schedule does not run extra queries"""
+    FeedFactory.create_batch(5)
+    with django_assert_num_queries(1):
+        list(Feed.objects.only("pk"))
+
+
+@pytest.mark.freeze_time
+def test_next_run_updated_when_adaptive(freezer, settings):
+    """The next run is updated when a Feed is changed to be adaptive"""
+    settings.FEEDS_LOAD_SCHEDULE = "0 * * * *"
+    freezer.move_to(timezone.now().replace(minute=0, hour=10))
+    feed = FeedFactory.create(adaptive=False)
+    add_articles(feed, 6, 6)
+    feed.adaptive = True
+    feed.save()
+    assert feed.interval == dt.timedelta(hours=6)
+    assert feed.next_run == timezone.now() + dt.timedelta(hours=6)
+    feed.adaptive = False
+    feed.save()
+    assert feed.next_run == timezone.now().replace(
+        minute=0, hour=11, second=0, microsecond=0
+    )
+
+
+def add_articles(feed, count, hours):
+    now = timezone.now()
+    for n in range(1, count + 1):
+        ArticleFactory.create(feed=feed, date=now - dt.timedelta(hours=hours * n))
+
+
+@pytest.mark.freeze_time
+def test_adaptive_schedule(freezer, settings):
+    """The next run is set from how often the feed publishes Articles"""
+    settings.FEEDS_LOAD_SCHEDULE = "0 * * * *"
+    freezer.move_to(timezone.now().replace(minute=0, hour=10))
+    feed = FeedFactory.create(adaptive=True)
+    add_articles(feed, 6, 6)
+    feed.reschedule(timezone.now())
+    assert feed.interval == dt.timedelta(hours=6)
+    assert feed.next_run == timezone.now() + dt.timedelta(hours=6)
+    assert feed.loads_saved == 5
+
+
+@pytest.mark.freeze_time
+def test_adaptive_schedule_limited(freezer, settings):
+    """The interval between runs is limited to the maximum"""
+    settings.FEEDS_ADAPTIVE_MAX_INTERVAL = 12 * 60
+    freezer.move_to(timezone.now().replace(minute=0, hour=10))
+    feed = FeedFactory.create(adaptive=True)
+    add_articles(feed, 6, 48)
+    feed.reschedule(timezone.now())
+    assert feed.interval == dt.timedelta(hours=12)
+
+
+@pytest.mark.freeze_time
+def test_adaptive_schedule_silent(freezer, settings):
+    """The interval grows when a feed stops publishing"""
+    settings.FEEDS_ADAPTIVE_MAX_INTERVAL = 7 * 24 * 60
+    freezer.move_to(timezone.now().replace(minute=0, hour=10))
+    feed = FeedFactory.create(adaptive=True)
+    add_articles(feed, 20, 2)
+    freezer.move_to(timezone.now() + dt.timedelta(days=2))
+    feed.reschedule(timezone.now())
+    assert feed.interval == dt.timedelta(days=2, hours=2)
+    freezer.move_to(timezone.now() + dt.timedelta(days=30))
+    feed.reschedule(timezone.now())
+    assert feed.interval == dt.timedelta(days=7)
+
+
+@pytest.mark.freeze_time
+def test_adaptive_schedule_history(freezer, settings):
+    """The schedule is used until the feed has published enough Articles"""
+    settings.FEEDS_LOAD_SCHEDULE = "0 * * * *"
+    freezer.move_to(timezone.now().replace(minute=30, hour=9))
+    feed = FeedFactory.create(adaptive=True)
+    add_articles(feed, settings.FEEDS_ADAPTIVE_MIN_HISTORY - 1, 6)
+    feed.reschedule(timezone.now())
+    assert feed.interval is None
+    assert feed.next_run == timezone.now().replace(
+        minute=0, hour=10, second=0, microsecond=0
+    )
+    assert feed.loads_saved == 0
+
+
+def test_backoff(settings):
+    """The delay doubles with each failure, up to the maximum"""
+    settings.FEEDS_BACKOFF_DELAY = 15
+    settings.FEEDS_BACKOFF_MAX_DELAY = 60
+    feed = FeedFactory.build()
+    delays = []
+    for feed.failures in range(5):
+        delays.append(feed.get_backoff())
+    assert delays == [None] + [dt.timedelta(minutes=m) for m in (15, 30, 60, 60)]
+
+
+@pytest.mark.freeze_time
+def test_backoff_schedule(freezer, settings):
+    """A failing feed is loaded after the delay, with jitter, has passed"""
+    settings.FEEDS_BACKOFF_DELAY = 120
+    feed = FeedFactory.create(failures=1)
+    now = timezone.now()
+    feed.reschedule(now)
+    assert now + dt.timedelta(hours=1) <= feed.next_run <= now + dt.timedelta(hours=2)
+
+
+@pytest.mark.freeze_time
+def test_backoff_retry_after(freezer):
+    """A feed is not loaded until after the time set by the server"""
+    feed = FeedFactory.create(failures=1)
+    now = timezone.now()
+    feed.reschedule(now, dt.timedelta(days=2))
+    assert feed.next_run == now + dt.timedelta(days=2)
+
+
+def test_failing_feed_disabled(settings):
+    """A feed is disabled once the number of failures reaches the limit"""
+    settings.FEEDS_DISABLE_FAILURES = 3
+    feed = FeedFactory.create(enabled=True, failures=2)
+    feed.reschedule(timezone.now())
+    assert feed.enabled is True
+    feed.failures = 3
+    feed.reschedule(timezone.now())
+    assert feed.enabled is False
@@ -0,0 +1,34 @@
+import pytest
+
+from feeds.models import Article, Tag
+from feeds.tests.factories import ArticleFactory, TagFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tags():
+    # The tags are used by 1, 2, ... 10 articles
+    tags = TagFactory.create_batch(10)
+    for count, tag in enumerate(tags, start=1):
+        ArticleFactory.create_batch(count, tags=[tag])
+    return tags
+
+
+def test_weighted(tags):
+    articles = Article.objects.all()
+    weights = {tag: tag.weight for tag in Tag.objects.for_articles(articles).weighted()}
+    assert [weights[tag] for tag in tags] == [1, 1, 2, 2, 3, 4, 4, 5, 5, 6]
+
+
+def test_weighted_for_articles(tags):
+    """Only the Articles in the queryset are counted"""
+    articles = Article.objects.filter(tags=tags[-1])
+    weighted = Tag.objects.for_articles(articles).weighted()
+    assert [tag.weight for tag in weighted] == [1]
+
+
+def test_weighted_query(tags, django_assert_num_queries):
+    """The Tags are counted in a single query"""
+    with django_assert_num_queries(1):
+        Tag.objects.for_articles(Article.objects.all()).weighted()
@@ -0,0 +1,115 @@
+import pytest
+
+from feeds import loader
+from feeds.loader import Response
+from feeds.parsers import FeedParser, ParseError, StreamingParser
+
+rss = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <title>Feed</title>
+    <item>
+      <title>Tom &amp; Jerry</title>
+      <link>https://www.example.com/first/</link>
+      <guid isPermaLink="false">Article:First</guid>
+      <description>&lt;p onclick="alert()"&gt;Summary&lt;/p&gt;</description>
+      <pubDate>Mon, 02 Oct 2023 10:00:00 +0000</pubDate>
+      <author>joe@example.com (Joe Bloggs)</author>
+      <dc:creator>Jane Doe</dc:creator>
+      <category>News</category>
+      <category>Sport</category>
+    </item>
+    <item>
+      <title>Second</title>
+      <guid>https://www.example.com/second/</guid>
+      <pubDate>Mon, 02 Oct 2023 11:00:00 +0000</pubDate>
+    </item>
+  </channel>
+</rss>
+"""
+
+atom = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:base="https://www.example.com/">
+  <title>Feed</title>
+  <entry>
+    <id>Article:Identifier</id>
+    <title type="html">A &amp;lt;b&amp;gt; title</title>
+    <link rel="alternate" href="/entry/"/>
+    <link rel="edit" href="/edit/"/>
+    <published>2023-10-02T10:00:00Z</published>
+    <updated>2023-10-02T12:00:00Z</updated>
+    <author><name>Article Author</name></author>
+    <content type="html">
+      &lt;p&gt;Content&lt;script&gt;x&lt;/script&gt;&lt;/p&gt;
+    </content>
+    <category term="Tag"/>
+  </entry>
+</feed>
+"""
+
+
+def parse(parser, content):
+    return [loader.Entry.from_item(item) for item in parser.parse(content, {})]
+
+
+@pytest.mark.parametrize("content", [rss, atom])
+def test_same_entries(content):
+    """The entries are the same as the ones from feedparser"""
+    assert parse(StreamingParser(), content) == parse(FeedParser(), content)
+
+
+def test_rss_fields():
+    """The values used to create an Article are extracted from RSS items"""
+    item = next(StreamingParser().parse(rss, {}))
+    assert item["id"] == "Article:First"
+    assert item["title"] == "Tom & Jerry"
+    assert item["link"] == "https://www.example.com/first/"
+    assert item["summary"] == "<p>Summary</p>"
+    assert item["authors"] == [{"name": "Joe Bloggs"}, {"name": "Jane Doe"}]
+    assert item["tags"] == [{"term": "News"}, {"term": "Sport"}]
+
+
+def test_guid_link():
+    """The guid is used as the link if it is a permalink"""
+    item = list(StreamingParser().parse(rss, {}))[1]
+    assert item["link"] == "https://www.example.com/second/"
+
+
+def test_atom_fields():
+    """The values used to create an Article are extracted from Atom entries"""
+    item = next(StreamingParser().parse(atom, {}))
+    assert item["link"] == "https://www.example.com/entry/"
+    assert item["summary"] == "<p>Content</p>"
+    assert item["published"] == "2023-10-02T10:00:00Z"
+    assert item["authors"] == [{"name": "Article Author"}]
+
+
+def test_relative_links():
+    """Relative links are resolved using the location of the document"""
+    content = rss.replace(b"https://www.example.com/first/", b"/first/")
+    headers = {"content-location": "https://www.example.org/feed/"}
+    item = next(StreamingParser().parse(content, headers))
+    assert item["link"] == "https://www.example.org/first/"
+
+
+def test_parse_error():
+    """Errors in the XML are reported"""
+    content = b"<rss><channel><item><title>Title</item></channel></rss>"
+    with pytest.raises(ParseError):
+        list(StreamingParser().parse(content, {}))
+
+
+def test_not_a_feed():
+    """Documents which are not RSS or Atom feeds are reported"""
+    content = b"<html><body><p>Not found</p></body></html>"
+    with pytest.raises(ParseError):
+        list(StreamingParser().parse(content, {}))
+
+
+@pytest.mark.parametrize("parser", ["FeedParser", "StreamingParser"])
+def test_entries_limited(settings, parser):
+    """The number of entries loaded from a feed can be limited"""
+    settings.FEEDS_PARSER = "feeds.parsers." + parser
+    settings.FEEDS_MAX_ENTRIES = 1
+    parsed = loader.parse_feed(Response(url="", status=200, content=rss))
+    assert [entry.identifier for entry in parsed.entries] == ["Article:First"]
@@ -0,0 +1,166 @@
+import threading
+
+from django.db import connection
+from django.utils import timezone
+
+import pytest
+
+from feeds import loader, tasks
+from feeds.tests.factories import FeedFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def dispatch(dispatched, countdowns=None):
+    # Replaces apply_async() to record the feeds the tasks are sent for.
+    def apply_async(args, countdown=0):
+        dispatched.append(args[0])
+        if countdowns is not None:
+            countdowns[args[0]] = countdown
+
+    return apply_async
+
+
+def test_feeds_dispatched(monkeypatch, django_capture_on_commit_callbacks):
+    """A task is dispatched for each feed that is due"""
+    due = FeedFactory.create_batch(3, enabled=True, next_run=timezone.now())
+    FeedFactory.create(enabled=False, next_run=timezone.now())
+    dispatched = []
+    monkeypatch.setattr(tasks.load_feed, "apply_async", dispatch(dispatched))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.load_feeds()
+
+    assert sorted(dispatched) == sorted(feed.pk for feed in due)
+
+
+def test_feeds_dispatched_once(monkeypatch, django_capture_on_commit_callbacks):
+    """Feeds are not dispatched again if the task runs before they are loaded"""
+    FeedFactory.create(enabled=True, next_run=timezone.now())
+    dispatched = []
+    monkeypatch.setattr(tasks.load_feed, "apply_async", dispatch(dispatched))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.load_feeds()
+        tasks.load_feeds()
+
+    assert len(dispatched) == 1
+
+
+def test_requests_to_host_spaced(
+    monkeypatch, settings, django_capture_on_commit_callbacks
+):
+    """The tasks for feeds from the same host are delayed by the rate limit"""
+    settings.FEEDS_LOAD_HOST_RATE = 0.5
+    settings.FEEDS_LOAD_HOST_WINDOW = 0
+    now = timezone.now()
+    first = FeedFactory.create(
+        url="https://a.example.com/1/", enabled=True, next_run=now
+    )
+    second = FeedFactory.create(
+        url="https://a.example.com/2/", enabled=True, next_run=now
+    )
+    other = FeedFactory.create(url="https://b.example.com/", enabled=True, next_run=now)
+    dispatched, countdowns = [], {}
+    monkeypatch.setattr(
+        tasks.load_feed, "apply_async", dispatch(dispatched, countdowns)
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.load_feeds()
+
+    assert sorted([countdowns[first.pk], countdowns[second.pk]]) == [0.0, 2.0]
+    assert countdowns[other.pk] == 0.0
+
+
+def test_requests_to_host_spread(
+    monkeypatch, settings, django_capture_on_commit_callbacks
+):
+    """The tasks for feeds from the same host are spread across the window"""
+    settings.FEEDS_LOAD_HOST_RATE = 0
+    settings.FEEDS_LOAD_HOST_WINDOW = 300
+    now = timezone.now()
+    for idx in range(3):
+        FeedFactory.create(
+            url="https://a.example.com/%d/" % idx, enabled=True, next_run=now
+        )
+    dispatched, countdowns = [], {}
+    monkeypatch.setattr(
+        tasks.load_feed, "apply_async", dispatch(dispatched, countdowns)
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.load_feeds()
+
+    assert sorted(countdowns.values()) == [0.0, 100.0, 200.0]
+
+
+def test_feed_loaded(monkeypatch):
+    """The per-feed task loads the feed"""
+    loaded = []
+    monkeypatch.setattr(loader, "load_feed", lambda feed: loaded.append(feed) or True)
+    feed = FeedFactory.create()
+    assert tasks.load_feed(feed.pk) is True
+    assert loaded == [feed]
+
+
+def test_deleted_feed_skipped():
+    """The task does nothing if the feed was deleted"""
+    assert tasks.load_feed(0) is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_locked_feed_skipped(monkeypatch):
+    """A feed that is already being loaded is skipped"""
+    feed = FeedFactory.create()
+    locked = threading.Event()
+    finished = threading.Event()
+
+    def lock_feed():
+        with tasks.feed_lock(feed.pk):
+            locked.set()
+            finished.wait(5)
+        connection.close()
+
+    def mock_load_feed(feed):
+        raise AssertionError("Feed was loaded")
+
+    monkeypatch.setattr(loader, "load_feed", mock_load_feed)
+    thread = threading.Thread(target=lock_feed)
+    thread.start()
+    locked.wait(5)
+
+    try:
+        assert tasks.load_feed(feed.pk) is False
+    finally:
+        finished.set()
+        thread.join()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lock_released(monkeypatch):
+    """The lock is released after the feed is loaded, even if it fails"""
+    feed = FeedFactory.create()
+
+    def mock_load_feed(feed):
+        raise ValueError
+
+    monkeypatch.setattr(loader, "load_feed", mock_load_feed)
+    with pytest.raises(ValueError):
+        tasks.load_feed(feed.pk)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")
+        assert cursor.fetchone()[0] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_not_loaded_in_transaction(monkeypatch):
+    """No transaction is open while the feed is fetched"""
+    feed = FeedFactory.create()
+    atomic = []
+    monkeypatch.setattr(
+        loader, "load_feed", lambda feed: atomic.append(connection.in_atomic_block)
+    )
+    tasks.load_feed(feed.pk)
+    assert atomic == [False]